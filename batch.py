@@ -0,0 +1,240 @@
+import os
+import csv
+import json
+import time
+import asyncio
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator
+from agents.models.interface import Model
+import tools_agents
+from tools_agents import (
+    military_agent,
+    economic_agent,
+    sentiment_agent,
+    reflection_agent,
+)
+from pipeline import pipeline_prediction_agent, run_pipeline
+
+
+class LimitedModel(Model):
+    """Model wrapper that caps how many LLM calls are in flight at once."""
+
+    def __init__(self, model: Model, semaphore: asyncio.Semaphore):
+        self.model = model
+        self.semaphore = semaphore
+
+    async def get_response(self, *args, **kwargs):
+        async with self.semaphore:
+            return await self.model.get_response(*args, **kwargs)
+
+    async def stream_response(self, *args, **kwargs) -> AsyncIterator:
+        async with self.semaphore:
+            async for event in self.model.stream_response(*args, **kwargs):
+                yield event
+
+
+def limit_llm_concurrency(limit: int) -> None:
+    """Route every pipeline agent's model through one shared semaphore."""
+    semaphore = asyncio.Semaphore(limit)
+    for agent in (
+        military_agent,
+        economic_agent,
+        sentiment_agent,
+        reflection_agent,
+        pipeline_prediction_agent,
+    ):
+        model = agent.model
+        if isinstance(model, LimitedModel):
+            model = model.model
+        agent.model = LimitedModel(model, semaphore)
+
+
+def pair_key(country1: str, country2: str) -> str:
+    return f"{country1.strip().lower()}|{country2.strip().lower()}"
+
+
+def load_pairs(path: str | Path) -> list[tuple[str, str]]:
+    """
+    Read country pairs from a JSONL file ({"country1": ..., "country2": ...})
+    or a CSV file with country1,country2 columns (header optional).
+    """
+    path = Path(path)
+    pairs = []
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.suffix.lower() == ".csv":
+            for row in csv.reader(f):
+                if len(row) < 2 or not row[0].strip():
+                    continue
+                if row[0].strip().lower() == "country1":
+                    continue
+                pairs.append((row[0].strip(), row[1].strip()))
+        else:
+            for line in f:
+                if line.strip():
+                    item = json.loads(line)
+                    pairs.append((item["country1"], item["country2"]))
+    return pairs
+
+
+def load_completed(path: str | Path) -> set[str]:
+    """Return the keys of pairs that already finished successfully in output."""
+    completed = set()
+    if not Path(path).exists():
+        return completed
+    # errors="replace": a crash can cut a multibyte character in half
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a truncated last line behind
+                continue
+            if item.get("status") == "ok":
+                completed.add(pair_key(item["country1"], item["country2"]))
+    return completed
+
+
+def pending_pairs(
+    pairs: list[tuple[str, str]], completed: set[str]
+) -> list[tuple[str, str]]:
+    """Pairs not yet completed, without duplicates, in input order."""
+    pending, seen = [], set(completed)
+    for country1, country2 in pairs:
+        key = pair_key(country1, country2)
+        if key not in seen:
+            seen.add(key)
+            pending.append((country1, country2))
+    return pending
+
+
+def truncate_partial_line(path: str | Path) -> None:
+    """
+    Cut a last line left half-written by a crash back to the previous
+    newline. Works on bytes, so a line cut mid-character is dropped too.
+    """
+    with open(path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        size = end
+        while end > 0:
+            start = max(0, end - 65536)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b"\n")
+            if newline != -1:
+                end = start + newline + 1
+                break
+            end = start
+        if end < size:
+            f.truncate(end)
+
+
+def open_output(output: str | Path):
+    """Open the JSONL output for appending, dropping a half-written last line."""
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    if Path(output).exists():
+        truncate_partial_line(output)
+    return open(output, "a", encoding="utf-8")
+
+
+def write_record(out, record: dict) -> None:
+    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    out.flush()
+    os.fsync(out.fileno())
+
+
+async def run_pair(country1: str, country2: str, narrative: bool = True) -> dict:
+    """Run the pipeline for one pair and return its output record."""
+    started = time.perf_counter()
+    record = {"country1": country1, "country2": country2}
+    try:
+        result = await run_pipeline(country1, country2, _print=False, narrative=narrative)
+        record["prediction"] = result["prediction"]
+        record["scores"] = result["scores"]
+        record["sensitivity"] = result["sensitivity"]
+        record["citations"] = result["citations"]
+        record["budget"] = result["budget"]
+        record["metrics"] = result["metrics"]
+        record["status"] = "ok"
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = str(e)
+    record["elapsed"] = round(time.perf_counter() - started, 3)
+    record["completed_at"] = datetime.now().isoformat()
+    return record
+
+
+async def run_batch(
+    pairs: list[tuple[str, str]],
+    output: str | Path,
+    concurrency: int = 4,
+    llm_concurrency: int = 8,
+    search_concurrency: int = 4,
+    narrative: bool = True,
+) -> dict:
+    """
+    Run the pipeline for every pair not already completed in output,
+    appending one JSON line per pair as soon as it finishes.
+    """
+    tools_agents.TAVILY_MAX_CONCURRENCY = search_concurrency
+    limit_llm_concurrency(llm_concurrency)
+
+    completed = load_completed(output)
+    pending = pending_pairs(pairs, completed)
+
+    print(
+        f"📦 {len(pairs)} pairs: {len(completed)} already done, {len(pending)} to run"
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+    counts = {"ok": 0, "error": 0}
+
+    with open_output(output) as out:
+        async def run_one(country1: str, country2: str):
+            async with semaphore:
+                record = await run_pair(country1, country2, narrative)
+
+            write_record(out, record)
+            counts[record["status"]] += 1
+            icon = "✅" if record["status"] == "ok" else "❌"
+            print(
+                f"{icon} [{counts['ok'] + counts['error']}/{len(pending)}] "
+                f"{country1} vs {country2} ({record['elapsed']}s)"
+            )
+
+        await asyncio.gather(*(run_one(c1, c2) for c1, c2 in pending))
+
+    return {"skipped": len(completed), **counts}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Analyse many country pairs without the interactive CLI."
+    )
+    parser.add_argument("input", help="JSONL or CSV file of country pairs")
+    parser.add_argument(
+        "-o", "--output", default="reports/batch_results.jsonl", help="JSONL output"
+    )
+    parser.add_argument("--concurrency", type=int, default=4, help="pairs in flight")
+    parser.add_argument("--llm-concurrency", type=int, default=8)
+    parser.add_argument("--search-concurrency", type=int, default=4)
+    parser.add_argument(
+        "--no-narrative",
+        action="store_true",
+        help="score pairs locally without the Prediction Agent narrative",
+    )
+    args = parser.parse_args()
+
+    summary = asyncio.run(
+        run_batch(
+            load_pairs(args.input),
+            args.output,
+            concurrency=args.concurrency,
+            llm_concurrency=args.llm_concurrency,
+            search_concurrency=args.search_concurrency,
+            narrative=not args.no_narrative,
+        )
+    )
+    print(
+        f"\n🏁 Batch finished: {summary['ok']} ok, {summary['error']} failed, "
+        f"{summary['skipped']} skipped"
+    )
@@ -0,0 +1,122 @@
+import json
+import time
+import asyncio
+import argparse
+import numpy as np
+from pathlib import Path
+from agents import SQLiteSession, set_tracing_disabled
+from replay import install_recorder, install_replay, load_recordings
+from main import run_turn
+from pipeline import run_pipeline
+
+PAIRS = [
+    ("India", "Pakistan"),
+    ("Iran", "Iraq"),
+    ("Turkey", "Greece"),
+    ("Egypt", "Ethiopia"),
+    ("Brazil", "Argentina"),
+]
+
+
+async def _run_once(mode: str, i: int) -> float:
+    country1, country2 = PAIRS[i % len(PAIRS)]
+    started = time.perf_counter()
+    if mode == "main":
+        final_result, *_ = await run_turn(
+            f"{country1} and {country2}", SQLiteSession(f"bench-{i}"), _print=False
+        )
+        if final_result is None:
+            raise RuntimeError("Prediction Agent did not answer")
+    else:
+        await run_pipeline(country1, country2, _print=False)
+    return time.perf_counter() - started
+
+
+async def run_benchmark(mode: str, iterations: int, concurrency: int) -> dict:
+    """Run iterations of one mode and summarise latency and throughput."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(i: int) -> float:
+        async with semaphore:
+            return await _run_once(mode, i)
+
+    started = time.perf_counter()
+    latencies = np.array(await asyncio.gather(*(bounded(i) for i in range(iterations))))
+    wall = time.perf_counter() - started
+    return {
+        "mode": mode,
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "p50": round(float(np.percentile(latencies, 50)), 4),
+        "p95": round(float(np.percentile(latencies, 95)), 4),
+        "mean": round(float(latencies.mean()), 4),
+        "throughput_per_s": round(iterations / wall, 2),
+    }
+
+
+async def record(args) -> Path:
+    """Run the live graph through the recorder and save what it returned."""
+    recorder = install_recorder()
+    for mode in _modes(args):
+        await run_benchmark(mode, args.iterations, args.concurrency)
+    return recorder.save(args.record)
+
+
+def _modes(args) -> tuple[str, ...]:
+    return ("main", "pipeline") if args.mode == "both" else (args.mode,)
+
+
+async def main(args) -> list[dict]:
+    set_tracing_disabled(True)
+    recordings = load_recordings(args.recordings)
+    results = []
+    for mode in _modes(args):
+        # Orchestration overhead: the same graph with zero injected latency
+        install_replay(recordings)
+        overhead = await run_benchmark(mode, min(args.iterations, 10), 1)
+
+        model, search_client = install_replay(
+            recordings, args.llm_latency, args.search_latency, args.jitter
+        )
+        result = await run_benchmark(mode, args.iterations, args.concurrency)
+        result["orchestration_overhead_p50"] = overhead["p50"]
+        result["llm_calls_per_run"] = round(model.calls / args.iterations, 1)
+        result["searches_per_run"] = round(search_client.calls / args.iterations, 1)
+        results.append(result)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Offline benchmark of the agent graph with replayed LLM and search."
+    )
+    parser.add_argument("--mode", choices=("main", "pipeline", "both"), default="both")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per LLM call")
+    parser.add_argument("--search-latency", type=float, default=0.3, help="seconds per search")
+    parser.add_argument("--jitter", type=float, default=0.0, help="± seconds of latency noise")
+    parser.add_argument("--recordings", default=None, help="recordings JSON from replay.Recorder")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument(
+        "--record",
+        metavar="PATH",
+        help="run the live APIs instead and save their responses as recordings",
+    )
+    args = parser.parse_args()
+
+    if args.record:
+        path = asyncio.run(record(args))
+        print(f"🎞️ Recordings saved to {path}")
+    else:
+        results = asyncio.run(main(args))
+        if args.json:
+            print(json.dumps(results, indent=2))
+        else:
+            for r in results:
+                print(
+                    f"⏱️ {r['mode']:<8} p50 {r['p50']:.3f}s  p95 {r['p95']:.3f}s  "
+                    f"{r['throughput_per_s']:.2f} runs/s  "
+                    f"overhead {r['orchestration_overhead_p50'] * 1000:.1f}ms  "
+                    f"({r['llm_calls_per_run']} LLM calls, {r['searches_per_run']} searches per run)"
+                )
@@ -0,0 +1,133 @@
+import os
+import time
+from contextvars import ContextVar
+
+# 💸 Per-run limits (override with environment variables)
+DEFAULT_MAX_TOOL_CALLS = {
+    "ReflectionAgent": int(os.getenv("RUN_MAX_REFLECTION_CALLS", "3")),
+    "CitationsAgent": int(os.getenv("RUN_MAX_CITATION_CALLS", "2")),
+}
+DEFAULT_MAX_TOTAL_TOKENS = int(os.getenv("RUN_MAX_TOTAL_TOKENS", "200000"))
+DEFAULT_DEADLINE_SECONDS = float(os.getenv("RUN_DEADLINE_SECONDS", "300"))
+
+BUDGET_EXHAUSTED_NOTE = """
+**Budget exhausted** ({reason}). Do not call any more tools.
+Write the final prediction now from the data you already have.
+"""
+
+_current_budget: ContextVar["RunBudget | None"] = ContextVar(
+    "current_budget", default=None
+)
+
+
+class RunBudget:
+    """
+    Tool-call, token and wall-clock limits for one prediction run.
+    Once a limit is hit the affected tools are hidden from the
+    orchestrator so it falls through to writing the prediction.
+    """
+
+    def __init__(
+        self,
+        max_tool_calls: dict | None = None,
+        max_total_tokens: int = DEFAULT_MAX_TOTAL_TOKENS,
+        deadline_seconds: float = DEFAULT_DEADLINE_SECONDS,
+    ):
+        self.max_tool_calls = {**DEFAULT_MAX_TOOL_CALLS, **(max_tool_calls or {})}
+        self.max_total_tokens = max_total_tokens
+        self.deadline_seconds = deadline_seconds
+        self.started = time.monotonic()
+        self.tool_calls: dict[str, int] = {}
+        self.tool_tokens = 0
+        self.orchestrator_tokens = 0
+        self.cut_off: set[str] = set()
+
+    @property
+    def tokens_used(self) -> int:
+        return self.tool_tokens + self.orchestrator_tokens
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def exhausted(self) -> str | None:
+        """Return why the whole run is out of budget, or None."""
+        if self.max_total_tokens and self.tokens_used >= self.max_total_tokens:
+            return f"token limit of {self.max_total_tokens} reached"
+        if self.deadline_seconds and self.elapsed >= self.deadline_seconds:
+            return f"deadline of {self.deadline_seconds:.0f}s reached"
+        return None
+
+    def allows(self, tool_name: str) -> bool:
+        """Whether the orchestrator may still call tool_name."""
+        allowed = self.exhausted() is None
+        limit = self.max_tool_calls.get(tool_name)
+        if allowed and limit is not None:
+            allowed = self.tool_calls.get(tool_name, 0) < limit
+        if not allowed:
+            self.cut_off.add(tool_name)
+        return allowed
+
+    def record_tool_call(self, tool_name: str) -> None:
+        self.tool_calls[tool_name] = self.tool_calls.get(tool_name, 0) + 1
+
+    def record_tool_run(self, tool_name: str, result) -> None:
+        """Count a finished agent-as-tool run and its token usage."""
+        self.record_tool_call(tool_name)
+        self.tool_tokens += result.context_wrapper.usage.total_tokens
+
+    def record_run(self, result) -> None:
+        """Add the token usage of a finished top-level Runner.run."""
+        self.orchestrator_tokens += result.context_wrapper.usage.total_tokens
+
+    def update_from_stream(self, result) -> None:
+        """Refresh orchestrator usage from a RunResultStreaming in progress."""
+        self.orchestrator_tokens = result.context_wrapper.usage.total_tokens
+
+    def report(self) -> dict:
+        """Budget consumption for the saved report."""
+        return {
+            "exhausted": self.exhausted(),
+            "elapsed_seconds": round(self.elapsed, 2),
+            "deadline_seconds": self.deadline_seconds,
+            "tokens_used": self.tokens_used,
+            "max_total_tokens": self.max_total_tokens,
+            "tool_calls": dict(self.tool_calls),
+            "max_tool_calls": dict(self.max_tool_calls),
+            "cut_off_tools": sorted(self.cut_off),
+        }
+
+
+def set_budget(budget: "RunBudget | None"):
+    """Make budget the active budget for the current run (task context)."""
+    return _current_budget.set(budget)
+
+
+def get_budget() -> "RunBudget | None":
+    return _current_budget.get()
+
+
+def tool_enabled(tool_name: str):
+    """is_enabled callback for .as_tool(...) that consults the active budget."""
+
+    def is_enabled(ctx, agent) -> bool:
+        budget = get_budget()
+        return budget is None or budget.allows(tool_name)
+
+    return is_enabled
+
+
+def budget_instructions(instructions: str):
+    """
+    Wrap static agent instructions so that, once the active budget is
+    exhausted, the agent is told to stop calling tools and answer.
+    """
+
+    def dynamic_instructions(ctx, agent) -> str:
+        budget = get_budget()
+        reason = budget.exhausted() if budget is not None else None
+        if reason is None:
+            return instructions
+        return instructions + BUDGET_EXHAUSTED_NOTE.format(reason=reason)
+
+    return dynamic_instructions
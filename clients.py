@@ -0,0 +1,123 @@
+import os
+import asyncio
+from dotenv import load_dotenv
+from agents import (
+    AsyncOpenAI,
+    OpenAIChatCompletionsModel,
+    set_tracing_disabled,
+)
+from agents.models.interface import Model
+from openai import DefaultAsyncHttpxClient
+from tavily import AsyncTavilyClient
+from resilience import ResilientModel
+import httpx
+
+# 🌿 Load environment variables (once, for every module)
+load_dotenv()
+set_tracing_disabled(disabled=False)
+os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY", "")
+
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
+
+# 🔌 Connection pool shared by every LLM client
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+
+PROVIDERS = {
+    "gemini": {"api_key_env": "GEMINI_API_KEY", "base_url": GEMINI_BASE_URL},
+    "openai": {"api_key_env": "OPENAI_API_KEY_2", "base_url": None},
+}
+
+# Clients hold connections bound to one event loop, so the registry is
+# rebuilt when a new loop (e.g. a second asyncio.run) asks for them.
+_registry: dict = {"loop": None, "http": None, "openai": {}, "models": {}, "tavily": None}
+
+
+def _current() -> dict:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    if _registry["loop"] is not loop:
+        _registry.update(loop=loop, http=None, openai={}, models={}, tavily=None)
+    return _registry
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Pooled HTTP client shared by all LLM providers."""
+    registry = _current()
+    if registry["http"] is None:
+        registry["http"] = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            )
+        )
+    return registry["http"]
+
+
+def get_openai_client(provider: str) -> AsyncOpenAI:
+    """AsyncOpenAI client for a provider, created on first use."""
+    registry = _current()
+    if provider not in registry["openai"]:
+        config = PROVIDERS[provider]
+        registry["openai"][provider] = AsyncOpenAI(
+            api_key=os.getenv(config["api_key_env"]),
+            base_url=config["base_url"],
+            http_client=get_http_client(),
+            # Retries, deadlines and failover are handled by ResilientModel
+            max_retries=0,
+        )
+    return registry["openai"][provider]
+
+
+def get_model(name: str, provider: str) -> OpenAIChatCompletionsModel:
+    registry = _current()
+    if name not in registry["models"]:
+        registry["models"][name] = OpenAIChatCompletionsModel(
+            model=name, openai_client=get_openai_client(provider)
+        )
+    return registry["models"][name]
+
+
+def get_tavily_client() -> AsyncTavilyClient:
+    """Tavily client, created on first use."""
+    registry = _current()
+    if registry["tavily"] is None:
+        registry["tavily"] = AsyncTavilyClient(os.getenv("TAVILY_API_KEY"))
+    return registry["tavily"]
+
+
+async def close_clients() -> None:
+    """Close pooled connections (call before the event loop shuts down)."""
+    registry = _current()
+    if registry["http"] is not None:
+        await registry["http"].aclose()
+    registry.update(http=None, openai={}, models={}, tavily=None)
+
+
+class LazyModel(Model):
+    """
+    Model handle for agent definitions. The real client and model are
+    only built, from the shared registry, when the first call is made.
+    """
+
+    def __init__(self, name: str, provider: str):
+        self.name = name
+        self.provider = provider
+
+    async def get_response(self, *args, **kwargs):
+        return await get_model(self.name, self.provider).get_response(*args, **kwargs)
+
+    def stream_response(self, *args, **kwargs):
+        return get_model(self.name, self.provider).stream_response(*args, **kwargs)
+
+
+# 🛟 Each model fails over to the other provider (LLM_FAILOVER=0 disables)
+LLM_FAILOVER = os.getenv("LLM_FAILOVER", "1") != "0"
+
+_gemini = ("gemini", LazyModel("gemini-2.5-flash", "gemini"))
+_gpt = ("openai", LazyModel("gpt-4.1", "openai"))
+
+gemini_llm = ResilientModel([_gemini, _gpt] if LLM_FAILOVER else [_gemini])
+gpt_llm = ResilientModel([_gpt, _gemini] if LLM_FAILOVER else [_gpt])
@@ -0,0 +1,97 @@
+import re
+from urllib.parse import urlsplit
+
+# ✂️ Limits for what a search result may put into an agent's context
+DEFAULT_MAX_RESULTS = 5
+DEFAULT_SNIPPET_CHARS = 600
+DEFAULT_MIN_SCORE = 0.0
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {"a", "an", "and", "the", "of", "in", "on", "for", "to", "with", "by", "is"}
+
+
+def canonical_url(url: str) -> str:
+    """URL without scheme, www., query string, fragment or trailing slash."""
+    parts = urlsplit(url.strip().lower())
+    host = parts.netloc.removeprefix("www.")
+    return f"{host}{parts.path.rstrip('/')}"
+
+
+def _terms(text: str) -> set[str]:
+    return {w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS}
+
+
+def key_snippet(content: str, query: str, max_chars: int = DEFAULT_SNIPPET_CHARS) -> str:
+    """
+    Pick the sentences of content that share the most terms with the
+    query (figures count as a match), kept in their original order and
+    cut to max_chars.
+    """
+    content = re.sub(r"[ \t]+", " ", content or "").strip()
+    if len(content) <= max_chars:
+        return content
+
+    sentences = [s.strip() for s in _SENTENCE_SPLIT.split(content) if s.strip()]
+    query_terms = _terms(query)
+    ranked = sorted(
+        range(len(sentences)),
+        key=lambda i: (
+            -(len(_terms(sentences[i]) & query_terms) + bool(re.search(r"\d", sentences[i]))),
+            i,
+        ),
+    )
+    chosen, used = [], 0
+    for i in ranked:
+        if used + len(sentences[i]) > max_chars:
+            continue
+        chosen.append(i)
+        used += len(sentences[i]) + 1
+    if not chosen:
+        return content[:max_chars].rsplit(" ", 1)[0] + " …"
+    return " ".join(sentences[i] for i in sorted(chosen))
+
+
+def compact_search_response(
+    response: dict,
+    query: str,
+    max_results: int = DEFAULT_MAX_RESULTS,
+    snippet_chars: int = DEFAULT_SNIPPET_CHARS,
+    min_score: float = DEFAULT_MIN_SCORE,
+) -> dict:
+    """
+    Shrink a raw Tavily response to what the agents need: duplicate
+    pages and near-identical texts are dropped, the rest is ranked by
+    relevance score and cut to max_results, and each result keeps only
+    its title, URL, score and a key snippet for citation.
+    """
+    results = sorted(
+        response.get("results") or [],
+        key=lambda r: r.get("score") or 0.0,
+        reverse=True,
+    )
+    compacted, seen_urls, seen_texts = [], set(), set()
+    for result in results:
+        if len(compacted) >= max_results:
+            break
+        if (result.get("score") or 0.0) < min_score:
+            continue
+        url = canonical_url(result.get("url") or "")
+        text = " ".join(sorted(_terms(result.get("content") or "")))
+        if (url and url in seen_urls) or (text and text in seen_texts):
+            continue
+        seen_urls.add(url)
+        seen_texts.add(text)
+        compacted.append(
+            {
+                "title": result.get("title"),
+                "url": result.get("url"),
+                "score": result.get("score"),
+                "snippet": key_snippet(result.get("content") or "", query, snippet_chars),
+            }
+        )
+
+    compact = {"query": response.get("query", query), "results": compacted}
+    if response.get("answer"):
+        compact["answer"] = key_snippet(response["answer"], query, snippet_chars)
+    return compact
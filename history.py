@@ -0,0 +1,433 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from datetime import datetime
+from pathlib import Path
+import numpy as np
+from scoring import (
+    DIMENSIONS,
+    FEATURE_NAMES,
+    dimension_scores,
+    extract_features,
+    split_pair_data,
+)
+
+# 📈 Append-only columnar history of every run's metrics and predictions
+HISTORY = os.getenv("HISTORY", "1") != "0"
+HISTORY_PATH = os.getenv("HISTORY_PATH", "history")
+HISTORY_CHUNK_ROWS = int(os.getenv("HISTORY_CHUNK_ROWS", "16384"))
+
+# One row per country per run; every column is float64 (ids included) so a
+# chunk is a single (columns x rows) array and each column is contiguous.
+COLUMNS = (
+    "timestamp",
+    "country",
+    "opponent",
+    "probability",
+    *(f"score.{d}" for d in DIMENSIONS),
+    *FEATURE_NAMES,
+)
+_INDEX = {column: i for i, column in enumerate(COLUMNS)}
+_PREDICTION = re.compile(
+    r"^[\s*#\-]*([^:\n*]+?)[\s*]*:\s*\**\s*(\d+(?:\.\d+)?)\s*%", re.MULTILINE
+)
+
+_stores: dict = {}
+
+
+def country_key(country: str) -> str:
+    return " ".join(country.lower().split())
+
+
+def resolve_column(name: str) -> str:
+    """Map a short name such as "gdp" or "public_morale" to its column."""
+    if name in COLUMNS:
+        return name
+    matches = [c for c in COLUMNS if c.endswith("." + name)]
+    if len(matches) != 1:
+        raise KeyError(f"unknown history column: {name!r}")
+    return matches[0]
+
+
+def parse_prediction(text: str) -> list[tuple[str, float]]:
+    """[(country, 0..1)] from "Country1: 90%\\nCountry2: 10%" lines."""
+    return [(name.strip(), float(p) / 100) for name, p in _PREDICTION.findall(text or "")]
+
+
+def prediction_for(text: str, country1: str, country2: str) -> float | None:
+    """
+    country1's 0..1 probability from a prediction text, using only the
+    "X: N%" lines whose names are the two countries (so a weights
+    breakdown such as "Military Strength: 40%" is ignored). None unless
+    both countries are found.
+    """
+    found = {}
+    for name, probability in parse_prediction(text):
+        found.setdefault(country_key(name), probability)
+    first, second = country_key(country1), country_key(country2)
+    if first == second or first not in found or second not in found:
+        return None
+    return found[first]
+
+
+class HistoryStore:
+    """
+    Columnar store of per-run country metrics. Rows are appended into
+    fixed-size memory-mapped chunks (<path>/chunk-NNNNNN.npy, one
+    contiguous array per column); index.db records how many rows each
+    chunk holds, its time range and which countries appear in it, so a
+    query only maps the chunks that can match.
+    """
+
+    def __init__(self, path: str | Path = HISTORY_PATH, chunk_rows: int = HISTORY_CHUNK_ROWS):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.chunk_rows = chunk_rows
+        self._maps: dict = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path / "index.db",
+            timeout=30,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS countries (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE
+            );
+            CREATE TABLE IF NOT EXISTS chunks (
+                id INTEGER PRIMARY KEY,
+                file TEXT NOT NULL,
+                columns TEXT NOT NULL,
+                capacity INTEGER NOT NULL,
+                rows INTEGER NOT NULL,
+                min_ts REAL,
+                max_ts REAL
+            );
+            CREATE TABLE IF NOT EXISTS chunk_countries (
+                country INTEGER NOT NULL,
+                chunk INTEGER NOT NULL,
+                PRIMARY KEY (country, chunk)
+            );
+            """
+        )
+
+    def _map(self, file: str, writable: bool = False) -> np.memmap:
+        # Chunks never change shape, so a mapping stays valid for reuse
+        key = (file, writable)
+        if key not in self._maps:
+            self._maps[key] = np.load(self.path / file, mmap_mode="r+" if writable else "r")
+        return self._maps[key]
+
+    def _country_id(self, country: str) -> int:
+        name = country_key(country)
+        self._conn.execute("INSERT OR IGNORE INTO countries (name) VALUES (?)", (name,))
+        return self._conn.execute("SELECT id FROM countries WHERE name = ?", (name,)).fetchone()[0]
+
+    def _open_chunk(self):
+        """Return (id, file, rows, capacity) of the chunk to append to."""
+        row = self._conn.execute(
+            "SELECT id, file, columns, rows, capacity FROM chunks ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        if row is not None and row[3] < row[4] and json.loads(row[2]) == list(COLUMNS):
+            return row[0], row[1], row[3], row[4]
+        chunk = (row[0] if row else 0) + 1
+        file = f"chunk-{chunk:06d}.npy"
+        array = np.lib.format.open_memmap(
+            self.path / file,
+            mode="w+",
+            dtype=np.float64,
+            shape=(len(COLUMNS), self.chunk_rows),
+        )
+        array.flush()
+        del array
+        self._conn.execute(
+            "INSERT INTO chunks VALUES (?, ?, ?, ?, 0, NULL, NULL)",
+            (chunk, file, json.dumps(COLUMNS), self.chunk_rows),
+        )
+        return chunk, file, 0, self.chunk_rows
+
+    def append(self, rows: list[dict]) -> int:
+        """
+        Append rows ({column: value}, "country"/"opponent" as names; missing
+        columns are NaN). Returns the number of rows written.
+        """
+        if not rows:
+            return 0
+        with self._lock:
+            # BEGIN IMMEDIATE serializes writers across processes; rows only
+            # become visible to readers when the new row count is committed
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                values = np.full((len(COLUMNS), len(rows)), np.nan)
+                for j, row in enumerate(rows):
+                    for column, value in row.items():
+                        if column in ("country", "opponent"):
+                            value = self._country_id(value)
+                        values[_INDEX[column], j] = value
+                written = 0
+                while written < len(rows):
+                    chunk, file, start, capacity = self._open_chunk()
+                    block = values[:, written : written + capacity - start]
+                    n = block.shape[1]
+                    array = self._map(file, writable=True)
+                    array[:, start : start + n] = block
+                    array.flush()
+                    timestamps = block[_INDEX["timestamp"]]
+                    self._conn.execute(
+                        "UPDATE chunks SET rows = ?, "
+                        "min_ts = MIN(COALESCE(min_ts, ?), ?), max_ts = MAX(COALESCE(max_ts, ?), ?) "
+                        "WHERE id = ?",
+                        (
+                            start + n,
+                            timestamps.min(), timestamps.min(),
+                            timestamps.max(), timestamps.max(),
+                            chunk,
+                        ),
+                    )
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO chunk_countries VALUES (?, ?)",
+                        [(int(c), chunk) for c in np.unique(block[_INDEX["country"]])],
+                    )
+                    written += n
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def record_pair(
+        self,
+        country1: str,
+        country2: str,
+        probability: float,
+        data: dict | None = None,
+        timestamp: float | None = None,
+    ) -> int:
+        """
+        Record one prediction: probability is country1's 0..1 chance and
+        data the pipeline's two-country agent outputs (features are NaN
+        without it). Writes one row for each side.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        data = {name: _oriented(output, country2) for name, output in (data or {}).items()}
+        first, second = split_pair_data(data)
+        a, b = extract_features(first), extract_features(second)
+        rows = []
+        for country, opponent, p, mine, theirs in (
+            (country1, country2, probability, a, b),
+            (country2, country1, 1 - probability, b, a),
+        ):
+            row = {
+                "timestamp": timestamp,
+                "country": country,
+                "opponent": opponent,
+                "probability": p,
+            }
+            row.update(zip((f"score.{d}" for d in DIMENSIONS), dimension_scores(mine, theirs)[0]))
+            row.update(zip(FEATURE_NAMES, mine))
+            rows.append(row)
+        return self.append(rows)
+
+    def query(
+        self,
+        country: str,
+        opponent: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        columns=("probability",),
+    ) -> dict:
+        """
+        Rows for country (against opponent, if given) with since <= timestamp
+        <= until, as {"timestamp", "opponent", <column>: array}, oldest first.
+        """
+        columns = [resolve_column(c) for c in columns]
+        since = -np.inf if since is None else since
+        until = np.inf if until is None else until
+        with self._lock:
+            ids = dict(self._conn.execute("SELECT name, id FROM countries").fetchall())
+            chunks = self._conn.execute(
+                "SELECT c.file, c.columns, c.rows FROM chunks c "
+                "JOIN chunk_countries cc ON cc.chunk = c.id "
+                "WHERE cc.country = ? AND c.rows > 0 AND c.max_ts >= ? AND c.min_ts <= ? "
+                "ORDER BY c.id",
+                (ids.get(country_key(country), -1), since, until),
+            ).fetchall()
+        names = {v: k for k, v in ids.items()}
+        parts = {c: [] for c in ("timestamp", "opponent", *columns)}
+        for file, chunk_columns, rows in chunks:
+            chunk_columns = json.loads(chunk_columns)
+            array = self._map(file)
+
+            def column(name):
+                if name not in chunk_columns:
+                    return np.full(rows, np.nan)
+                return array[chunk_columns.index(name), :rows]
+
+            timestamps = column("timestamp")
+            mask = (column("country") == ids[country_key(country)]) & (timestamps >= since)
+            mask &= timestamps <= until
+            if opponent is not None:
+                mask &= column("opponent") == ids.get(country_key(opponent), -1)
+            for name in parts:
+                parts[name].append(np.asarray(column(name)[mask]))
+        result = {
+            name: np.concatenate(values) if values else np.empty(0)
+            for name, values in parts.items()
+        }
+        order = np.argsort(result["timestamp"], kind="stable")
+        result = {name: values[order] for name, values in result.items()}
+        result["opponent"] = np.array([names.get(int(i), "") for i in result["opponent"]])
+        return result
+
+    def trend(
+        self,
+        country: str,
+        opponent: str | None = None,
+        days: float = 90,
+        column: str = "probability",
+    ) -> dict:
+        """Summary of one column over the last days, e.g. a win-probability trend."""
+        column = resolve_column(column)
+        rows = self.query(country, opponent, since=time.time() - days * 86400, columns=(column,))
+        values = rows[column][~np.isnan(rows[column])]
+        summary = {
+            "country": country,
+            "opponent": opponent,
+            "column": column,
+            "days": days,
+            "runs": len(values),
+        }
+        if len(values):
+            summary.update(
+                first=float(values[0]),
+                latest=float(values[-1]),
+                mean=float(values.mean()),
+                min=float(values.min()),
+                max=float(values.max()),
+            )
+        return summary
+
+    def stats(self) -> dict:
+        with self._lock:
+            chunks, rows = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(rows), 0) FROM chunks"
+            ).fetchone()
+            countries = self._conn.execute("SELECT COUNT(*) FROM countries").fetchone()[0]
+        return {"chunks": chunks, "rows": rows, "countries": countries}
+
+
+def get_history(path: str | Path = HISTORY_PATH) -> HistoryStore:
+    """Shared store per directory, opened on first use."""
+    path = str(path)
+    if path not in _stores:
+        _stores[path] = HistoryStore(path)
+    return _stores[path]
+
+
+def record_prediction(
+    country1: str, country2: str, probability: float, data: dict | None = None
+) -> None:
+    """Record a finished prediction in the history (unless HISTORY=0)."""
+    if not HISTORY:
+        return
+    try:
+        get_history().record_pair(country1, country2, probability, data)
+    except (OSError, sqlite3.Error) as e:
+        # The history is for trend analysis; it never fails a prediction
+        print(f"⚠️ Prediction not recorded in history: {e}")
+
+
+def _oriented(output, country2: str):
+    """Swap a two-country output whose country1 is actually country2."""
+    if not isinstance(output, dict) or not isinstance(output.get("country1"), dict):
+        return output
+    if country_key(str(output["country1"].get("country", ""))) != country_key(country2):
+        return output
+    return {**output, "country1": output.get("country2"), "country2": output["country1"]}
+
+
+def data_from_outputs(outputs: list) -> dict:
+    """Two-country data agent outputs from [{"agent", "output"}] tool outputs."""
+    data = {}
+    for item in outputs or []:
+        output = item.get("output")
+        if isinstance(output, str):
+            try:
+                output = json.loads(output)
+            except json.JSONDecodeError:
+                continue
+        if isinstance(output, dict) and isinstance(output.get("country2"), dict):
+            data[item.get("agent")] = output
+    return data
+
+
+def _report_countries(report: dict) -> tuple[str, str] | None:
+    """The compared countries: the scores' keys, else "A vs B" / "A and B" queries."""
+    scores = report.get("scores")
+    if isinstance(scores, dict):
+        names = [k for k in scores if k not in ("dimensions", "weights")]
+        if len(names) == 2:
+            return names[0], names[1]
+    query = str((report.get("metadata") or {}).get("user_query", ""))
+    names = re.split(r"\s+(?:vs\.?|versus|and)\s+", query.strip(), flags=re.IGNORECASE)
+    if len(names) == 2 and all(names):
+        return names[0], names[1]
+    return None
+
+
+def import_reports(store: HistoryStore, reports_dir: str | Path = "reports") -> int:
+    """One-off backfill from the JSON reports written before the history existed."""
+    imported = 0
+    for path in sorted(Path(reports_dir).glob("*.json")):
+        try:
+            report = json.loads(path.read_text(encoding="utf-8"))
+            timestamp = datetime.strptime(
+                report["metadata"]["timestamp"], "%Y-%m-%d %H:%M:%S"
+            ).timestamp()
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+            continue
+        countries = _report_countries(report)
+        if countries is None:
+            continue
+        country1, country2 = countries
+        p1 = prediction_for(str(report.get("analysis_result", "")), country1, country2)
+        if p1 is None:
+            continue
+        data = data_from_outputs(report.get("agent_outputs"))
+        store.record_pair(country1, country2, p1, data, timestamp)
+        imported += 1
+    return imported
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query or backfill the prediction history.")
+    parser.add_argument("--path", default=HISTORY_PATH)
+    commands = parser.add_subparsers(dest="command", required=True)
+    trend = commands.add_parser("trend", help="summarise a column over recent runs")
+    trend.add_argument("country")
+    trend.add_argument("opponent", nargs="?")
+    trend.add_argument("--days", type=float, default=90)
+    trend.add_argument("--column", default="probability")
+    backfill = commands.add_parser("import", help="backfill from saved JSON reports")
+    backfill.add_argument("reports_dir", nargs="?", default="reports")
+    commands.add_parser("stats")
+    args = parser.parse_args()
+
+    store = HistoryStore(args.path)
+    if args.command == "trend":
+        started = time.perf_counter()
+        summary = store.trend(args.country, args.opponent, args.days, args.column)
+        summary["elapsed_ms"] = round(1000 * (time.perf_counter() - started), 2)
+        print(json.dumps(summary, indent=2))
+    elif args.command == "import":
+        print(f"📥 Imported {import_reports(store, args.reports_dir)} reports")
+    else:
+        print(json.dumps(store.stats(), indent=2))
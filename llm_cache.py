@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import hashlib
+import inspect
+import sqlite3
+import threading
+from pathlib import Path
+from agents.items import ModelResponse
+from agents.models.interface import Model
+from agents.usage import Usage
+from openai.types.responses import ResponseCompletedEvent
+from replay import completed_event, output_item
+from resilience import get_answering_model, set_answering_model
+
+# 🧠 Opt-in disk cache of model responses for the reasoning agents
+# LLM_CACHE=off (default) | on (read-through) | replay (cache only, misses fail)
+LLM_CACHE = os.getenv("LLM_CACHE", "off").lower()
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.db")
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+_caches: dict = {}
+_SIGNATURE = inspect.signature(Model.get_response)
+
+
+class LLMCacheMiss(RuntimeError):
+    """Raised in replay mode when a model call is not in the cache."""
+
+
+def _normalize_items(input) -> list:
+    """
+    Input items without per-run noise: item ids are dropped and tool
+    call ids are renumbered in order, so reruns of a pair hash alike.
+    """
+    if isinstance(input, str):
+        return [{"role": "user", "content": input}]
+    call_ids: dict = {}
+    items = []
+    for item in input:
+        item = dict(item if isinstance(item, dict) else item.model_dump(exclude_unset=True))
+        item.pop("id", None)
+        if "call_id" in item:
+            item["call_id"] = call_ids.setdefault(item["call_id"], f"call_{len(call_ids)}")
+        items.append(item)
+    return items
+
+
+def cache_key(
+    model_name, system_instructions, input, model_settings, tools, output_schema, handoffs
+) -> str:
+    payload = {
+        "model": model_name,
+        "settings": model_settings.to_json_dict() if model_settings else None,
+        "instructions": system_instructions,
+        "input": _normalize_items(input),
+        "tools": [
+            [getattr(t, "name", None), getattr(t, "params_json_schema", None)] for t in tools
+        ],
+        "output_schema": (
+            output_schema.json_schema()
+            if output_schema is not None and not output_schema.is_plain_text()
+            else None
+        ),
+        "handoffs": [h.tool_name for h in handoffs],
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Model responses on disk keyed by cache_key; the least recently used
+    entries are evicted once the stored responses exceed max_bytes.
+    """
+
+    def __init__(self, path: str | Path = LLM_CACHE_PATH, max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+
+    def get(self, key: str) -> ModelResponse | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE llm_cache SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self.hits += 1
+        data = json.loads(row[0])
+        # A cached answer costs no tokens in this run
+        return ModelResponse(
+            output=[output_item(item) for item in data["output"]],
+            usage=Usage(),
+            response_id=None,
+        )
+
+    def set(self, key: str, model_name: str, output: list) -> None:
+        items = [item.model_dump(exclude_unset=True) for item in output]
+        if any(item.get("type") not in ("message", "function_call") for item in items):
+            return  # only messages and tool calls can be rebuilt
+        payload = json.dumps({"output": items}, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_name, payload, len(payload), now, now),
+            )
+            total = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()[0]
+            while total > self.max_bytes:
+                row = self._conn.execute(
+                    "SELECT key, size FROM llm_cache ORDER BY last_access LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    break
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (row[0],))
+                total -= row[1]
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+
+def get_llm_cache(path: str | Path = LLM_CACHE_PATH) -> LLMCache:
+    """Shared cache per file, opened on first use."""
+    path = str(path)
+    if path not in _caches:
+        _caches[path] = LLMCache(path)
+    return _caches[path]
+
+
+class CachedModel(Model):
+    """
+    Serves a model call from the LLM cache when the same model, settings,
+    instructions, tools and normalized input were seen before. In replay
+    mode a miss raises LLMCacheMiss instead of calling the model.
+    Responses from a failover candidate are not cached under the primary
+    model's key.
+    """
+
+    def __init__(self, model: Model, name: str, mode: str = "on", path=LLM_CACHE_PATH):
+        self.model = model
+        self.name = name
+        self.mode = mode
+        self.path = path
+
+    def _answered_by_primary(self) -> bool:
+        return get_answering_model() in (None, self.name)
+
+    def _key(self, args, kwargs) -> str:
+        call = _SIGNATURE.bind_partial(self, *args, **kwargs).arguments
+        return cache_key(
+            self.name,
+            call.get("system_instructions"),
+            call.get("input"),
+            call.get("model_settings"),
+            call.get("tools") or [],
+            call.get("output_schema"),
+            call.get("handoffs") or [],
+        )
+
+    async def get_response(self, *args, **kwargs):
+        key = self._key(args, kwargs)
+        cache = get_llm_cache(self.path)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        if self.mode == "replay":
+            raise LLMCacheMiss(f"no cached {self.name} response (LLM_CACHE=replay)")
+        set_answering_model(None)
+        response = await self.model.get_response(*args, **kwargs)
+        if self._answered_by_primary():
+            cache.set(key, self.name, response.output)
+        return response
+
+    async def stream_response(self, *args, **kwargs):
+        key = self._key(args, kwargs)
+        cache = get_llm_cache(self.path)
+        cached = cache.get(key)
+        if cached is not None:
+            yield completed_event(cached)
+            return
+        if self.mode == "replay":
+            raise LLMCacheMiss(f"no cached {self.name} response (LLM_CACHE=replay)")
+        set_answering_model(None)
+        async for event in self.model.stream_response(*args, **kwargs):
+            if isinstance(event, ResponseCompletedEvent) and self._answered_by_primary():
+                cache.set(key, self.name, event.response.output)
+            yield event
+
+
+def cached_model(model: Model, mode: str = LLM_CACHE) -> Model:
+    """Wrap model in the LLM cache when enabled (LLM_CACHE=on|replay)."""
+    if mode not in ("on", "replay"):
+        return model
+    return CachedModel(model, getattr(model, "name", type(model).__name__), mode)
@@ -1,19 +1,18 @@
 import os, sys
+import sqlite3
 import asyncio
 from agents import (
     Agent,
     Runner,
-    OpenAIChatCompletionsModel,
-    AsyncOpenAI,
     handoff,
-    set_tracing_disabled,
     ModelSettings,
     RunContextWrapper,
-    SQLiteSession,
     ItemHelpers,
 )
-from dotenv import load_dotenv
+from clients import gemini_llm, gpt_llm, close_clients
+from llm_cache import cached_model
 from tools_agents import (
+    search_cache,
     military_data_Agent,
     economic_data_Agent,
     sentiment_data_Agent,
@@ -22,31 +21,22 @@ from tools_agents import (
 )
 from agents.extensions.handoff_prompt import RECOMMENDED_PROMPT_PREFIX
 from pydantic import BaseModel, Field
-from reports import generate_report, save_report
+from reports import ReportWriter
+from sessions import RunSession, purge_sessions
+from budget import RunBudget, set_budget, budget_instructions
+from metrics import MetricsCollector, set_metrics
+from sources import SourceRegistry, set_sources
+from history import data_from_outputs, prediction_for, record_prediction
 from datetime import datetime
+from contextvars import ContextVar
 from pathlib import Path
 
 
 if sys.platform.startswith("win"):
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
-# 🌿 Load environment variables
-load_dotenv()
-set_tracing_disabled(disabled=False)
-
-TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
-os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY", "")
-
-# 🔐 Setup Gemini client
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
-
-external_client = AsyncOpenAI(api_key=GEMINI_API_KEY, base_url=BASE_URL)
-gimini_llm = OpenAIChatCompletionsModel(
-    model="gemini-2.5-flash", openai_client=external_client
-)
-external_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY_2"))
-gpt_llm = OpenAIChatCompletionsModel(model="gpt-4.1", openai_client=external_client)
+# 📈 Optional Prometheus text file for per-run metrics
+METRICS_PROM_FILE = os.getenv("METRICS_PROM_FILE")
 
 
 instructions = """
@@ -55,7 +45,7 @@ Your role is to coordinate the research process and produce a fair, well-reasone
 
 Instructions:  
 - Call every tool → military_data_agent, economic_data_agent, sentiment_data_agent Agent only one time
-- Call ReflectionAgent and CitationsAgent as many time as you need.
+- Call ReflectionAgent and CitationsAgent as many time as you need (tools disappear once the run's budget is used up).
 - Accept structured input from the Planning Agent (countries + research plan).  
 - Do not fetch information directly. Instead, call specialized Tool Agents when needed:  
   - Military Data Agent → for military strength comparison.  
@@ -81,9 +71,9 @@ Your goal is to provide the User with a clear, well-structured, and properly sou
 """
 
 prediction_agent = Agent(
-    model=gpt_llm,
+    model=cached_model(gpt_llm),
     name="Prediction Agent",
-    instructions=instructions,
+    instructions=budget_instructions(instructions),
     tools=[
         military_data_Agent,
         economic_data_Agent,
@@ -112,7 +102,7 @@ Now handoff plan to 'Prediction Agent'
 """
 
 planning_agent = Agent(
-    model=gimini_llm,
+    model=cached_model(gemini_llm),
     name="Planning Agent",
     instructions=f"""
                 {RECOMMENDED_PROMPT_PREFIX}
@@ -200,6 +190,15 @@ PROGRESS_STEPS = {
 }
 
 
+# 📡 Optional per-run listener for progress updates (e.g. the HTTP server)
+_progress_listener: ContextVar = ContextVar("progress_listener", default=None)
+
+
+def set_progress_listener(listener):
+    """Call listener(progress, description) on every progress update in this run."""
+    return _progress_listener.set(listener)
+
+
 def calculate_progress(
     agent_name: str, last_progress: float = 0.0, _print: bool = True
 ) -> float:
@@ -208,6 +207,7 @@ def calculate_progress(
     return the updated progress percentage.
     """
     progress = last_progress
+    description = None
     if agent_name in PROGRESS_STEPS:
         step_info = PROGRESS_STEPS[agent_name]
         progress = step_info["value"]
@@ -217,53 +217,130 @@ def calculate_progress(
     # so just bump progress slightly without exceeding 95
     if agent_name in ["ReflectionAgent", "CitationsAgent"]:
         progress = min(progress + 2, 95)
+    description = description or f"Running {agent_name}..."
+    if _progress_listener.get() is not None:
+        _progress_listener.get()(progress, description)
     if _print:
         sys.stdout.flush()
-        sys.stdout.write(
-            f"\r📊 Progress: {progress:.1f}% - {description or f'Running {agent_name}...'}"
-        )
+        sys.stdout.write(f"\r📊 Progress: {progress:.1f}% - {description}")
     return progress
 
 
+async def run_turn(
+    user_input: str,
+    session,
+    progress: float = 0,
+    _print: bool = True,
+    report: ReportWriter | None = None,
+):
+    """
+    Stream one user turn through the agent graph, starting at the
+    Requirement Gathering Agent. Returns (final_result, budget, metrics,
+    sources); final_result is None until the Prediction Agent has answered.
+    Tool outputs are written to report as they arrive, and the answered
+    prediction is recorded in the prediction history under the countries
+    handed off by the Requirement Gathering Agent.
+    """
+    final_result = None
+    tool_names = {}
+    outputs = []
+    countries = None
+    budget = RunBudget()
+    set_budget(budget)
+    metrics = MetricsCollector()
+    set_metrics(metrics)
+    sources = SourceRegistry()
+    set_sources(sources)
+    result = Runner.run_streamed(
+        RequirementGatheringAgent, user_input, session=session
+    )
+    async for event in result.stream_events():
+        budget.update_from_stream(result)
+        metrics.observe(event, result)
+        if event.type == "agent_updated_stream_event":
+            calculate_progress(event.new_agent.name, progress, False)
+        elif event.type == "run_item_stream_event":
+            if event.item.type == "tool_call_item":
+                tool_name = event.item.raw_item.name
+                tool_names[event.item.raw_item.call_id] = tool_name
+                if _print:
+                    print(event.item.agent.name, flush=True)
+                calculate_progress(tool_name, progress, _print)
+            elif (
+                event.item.type == "handoff_call_item"
+                and event.item.agent.name == "Requirement Gathering Agent"
+            ):
+                try:
+                    countries = RequirementInput.model_validate_json(
+                        event.item.raw_item.arguments
+                    )
+                except ValueError:
+                    countries = None
+            elif event.item.type == "tool_call_output_item":
+                call_id = event.item.raw_item["call_id"]
+                item = {"agent": tool_names.get(call_id, call_id), "output": event.item.output}
+                outputs.append(item)
+                if report is not None:
+                    report.write_item("agent_outputs", item)
+            elif (
+                event.item.type == "message_output_item"
+                and event.item.agent.name == "Prediction Agent"
+            ):
+                final_result = ItemHelpers.text_message_output(event.item)
+                if countries is not None and countries.country1 and countries.country2:
+                    probability = prediction_for(
+                        final_result, countries.country1, countries.country2
+                    )
+                    if probability is not None:
+                        record_prediction(
+                            countries.country1,
+                            countries.country2,
+                            probability,
+                            data_from_outputs(outputs),
+                        )
+                # No break: the stream has to run to the end for the turn
+                # to be saved to the session the report history is read from
+            elif (
+                event.item.type == "message_output_item"
+                and event.item.agent.name == "Requirement Gathering Agent"
+                and _print
+            ):
+                print(ItemHelpers.text_message_output(event.item))
+
+    metrics.finish(result)
+    return final_result, budget, metrics, sources
+
+
 async def main():
-    session = SQLiteSession("conversations.db")
+    # Each run gets its own conversation; sessions past retention are purged
+    purge_sessions()
+    session = RunSession()
     print("👋 Welcome! Which two countries do you want to compare?")
     progress = 0
-    _break = False
+    report = None
     while True:
         user_input = input("You: ")
-        async for event in Runner.run_streamed(
-            RequirementGatheringAgent, user_input, session=session
-        ).stream_events():
-            if event.type == "agent_updated_stream_event":
-                calculate_progress(event.new_agent.name, progress, False)
-            elif event.type == "run_item_stream_event":
-                if event.item.type == "tool_call_item":
-                    tool_name = event.item.raw_item.name
-                    print(event.item.agent.name, flush=True)
-                    calculate_progress(tool_name, progress)
-                elif (
-                    event.item.type == "message_output_item"
-                    and event.item.agent.name == "Prediction Agent"
-                ):
-                    final_result = ItemHelpers.text_message_output(event.item)
-                    _break = True
-                    break
-                elif (
-                    event.item.type == "message_output_item"
-                    and event.item.agent.name == "Requirement Gathering Agent"
-                ):
-                    print(ItemHelpers.text_message_output(event.item))
-
-        if _break:
+        # The report is streamed to disk from the first turn onwards
+        report = report or ReportWriter(user_input)
+        final_result, budget, metrics, sources = await run_turn(
+            user_input, session, progress, report=report
+        )
+        if final_result is not None:
             break
 
     if final_result:
         print("\n🔄 Generating report...")
 
         try:
-            report = await generate_report(session, final_result, user_input)
-            json_file, txt_file = save_report(report)
+            report.write_section("analysis_result", final_result)
+            report.write_section("citations", sources.citations())
+            report.write_section("budget", budget.report())
+            report.write_section("metrics", metrics.report())
+            try:
+                await report.write_conversation_history(session)
+            except sqlite3.Error as e:
+                print(f"⚠️ Conversation history not saved: {e}")
+            json_file, txt_file = report.close()
 
             print(f"✅ Report generated successfully!")
             print(f"📄 Text report saved: {txt_file}")
@@ -271,9 +348,22 @@ async def main():
 
             # Optionally display a summary
             print(f"\n📋 Report Summary:")
-            print(f"   - Generated at: {report['metadata']['timestamp']}")
-            print(f"   - Query analyzed: {report['metadata']['user_query']}")
+            print(f"   - Generated at: {report.timestamp}")
+            print(f"   - Query analyzed: {user_input}")
             print(f"   - Report files created in: reports/")
+            print(f"   - Sources cited: {len(sources)}")
+            print(
+                f"   - Budget: {budget.tokens_used} tokens, "
+                f"{budget.elapsed:.0f}s, tool calls {budget.tool_calls}"
+            )
+            if METRICS_PROM_FILE:
+                metrics.write_prometheus(METRICS_PROM_FILE)
+                print(f"   - Metrics written to: {METRICS_PROM_FILE}")
+            if search_cache is not None:
+                stats = search_cache.stats()
+                print(
+                    f"   - Search cache: {stats['hits']} hits / {stats['misses']} misses"
+                )
 
         except Exception as e:
             print(f"❌ Error generating report: {e}")
@@ -295,6 +385,7 @@ async def main():
             except Exception as fallback_error:
                 print(f"❌ Failed to save fallback report: {fallback_error}")
 
+    await close_clients()
     print("\n👋 Thank you for using the country comparison tool!")
 
 
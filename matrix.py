@@ -0,0 +1,132 @@
+import json
+import asyncio
+import argparse
+from datetime import datetime
+from itertools import combinations
+from pathlib import Path
+from budget import RunBudget, set_budget
+from metrics import MetricsCollector, set_metrics
+from pipeline import gather_country_data, pair_data, predict_from_data
+from sources import SourceRegistry, set_sources
+from snapshots import SnapshotStore
+
+
+async def gather_profiles(
+    countries: list[str], concurrency: int = 4, store: SnapshotStore | None = None
+) -> dict:
+    """
+    Collect military, economic and sentiment data once per country
+    (with a store, only the dimensions whose snapshot is stale).
+    Returns {country: {"collected_at": ..., "sources": [...], "<tool name>": output}}.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def gather_profile(country: str) -> dict:
+        sources = SourceRegistry()
+        set_sources(sources)
+        async with semaphore:
+            if store is not None:
+                data = await store.load_profile(country)
+            else:
+                data = await gather_country_data(country, _print=False)
+        print(f"🗂️ Profile ready: {country}")
+        return {
+            "collected_at": datetime.now().isoformat(),
+            "sources": sources.citations(),
+            **data,
+        }
+
+    profiles = await asyncio.gather(*(gather_profile(c) for c in countries))
+    return dict(zip(countries, profiles))
+
+
+async def run_matrix(
+    countries: list[str],
+    concurrency: int = 4,
+    narrative: bool = True,
+    store: SnapshotStore | None = None,
+) -> dict:
+    """
+    Predict every pairing of countries round-robin. Data agents run once per
+    country; each pair is scored locally and costs at most one Prediction
+    Agent run for the narrative.
+    """
+    countries = list(dict.fromkeys(c.strip() for c in countries if c.strip()))
+    profiles = await gather_profiles(countries, concurrency, store)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def predict(country1: str, country2: str) -> dict:
+        # CitationsAgent cites the sources behind both countries' profiles
+        sources = SourceRegistry()
+        for country in (country1, country2):
+            sources.extend(profiles[country]["sources"])
+        set_sources(sources)
+        # Each pair's narrative runs under its own budget and metrics
+        budget = RunBudget()
+        set_budget(budget)
+        metrics = MetricsCollector()
+        set_metrics(metrics)
+        async with semaphore:
+            try:
+                result = await predict_from_data(
+                    country1,
+                    country2,
+                    pair_data(profiles, country1, country2),
+                    narrative,
+                )
+                result["citations"] = sources.citations()
+                result["status"] = "ok"
+            except Exception as e:
+                result = {"error": str(e), "status": "error"}
+        result["budget"] = budget.report()
+        result["metrics"] = metrics.report()
+        print(f"⚔️ {country1} vs {country2}: {result['status']}")
+        return {"country1": country1, "country2": country2, **result}
+
+    pairs = list(combinations(countries, 2))
+    results = await asyncio.gather(*(predict(c1, c2) for c1, c2 in pairs))
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "countries": countries,
+        "profiles": profiles,
+        "pairs": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Round-robin predictions across N countries."
+    )
+    parser.add_argument("countries", nargs="+")
+    parser.add_argument("-o", "--output", default=None, help="JSON output file")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--no-narrative",
+        action="store_true",
+        help="score pairs locally without the Prediction Agent narrative",
+    )
+    parser.add_argument(
+        "--snapshots",
+        action="store_true",
+        help="reuse fresh per-country snapshots and re-fetch only stale dimensions",
+    )
+    args = parser.parse_args()
+
+    matrix = asyncio.run(
+        run_matrix(
+            args.countries,
+            args.concurrency,
+            not args.no_narrative,
+            SnapshotStore() if args.snapshots else None,
+        )
+    )
+
+    output = args.output
+    if output is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output = Path("reports") / f"country_matrix_{timestamp}.json"
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(matrix, f, indent=2, ensure_ascii=False)
+    print(f"\n📊 Matrix saved: {output}")
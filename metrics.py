@@ -0,0 +1,173 @@
+import time
+from contextvars import ContextVar
+from pathlib import Path
+
+_current_metrics: ContextVar["MetricsCollector | None"] = ContextVar(
+    "current_metrics", default=None
+)
+
+
+def _usage(result) -> dict:
+    usage = result.context_wrapper.usage
+    return {
+        "requests": usage.requests,
+        "input_tokens": usage.input_tokens,
+        "output_tokens": usage.output_tokens,
+        "total_tokens": usage.total_tokens,
+    }
+
+
+def _add(totals: dict, values: dict) -> None:
+    for key, value in values.items():
+        totals[key] = totals.get(key, 0) + value
+
+
+class MetricsCollector:
+    """
+    Per-agent and per-tool timings and token usage for one run.
+    Agent spans come from the Runner.run_streamed event loop
+    (observe/finish); tool timings and usage are recorded by the tools
+    themselves (record_tool_time, record_tool_run, record_search).
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_event: float | None = None
+        self.agents: dict[str, dict] = {}
+        self.tools: dict[str, dict] = {}
+        self.searches = {
+            "count": 0,
+            "cached": 0,
+            "coalesced": 0,
+            "total_seconds": 0.0,
+            "max_seconds": 0.0,
+        }
+        self._agent: str | None = None
+        self._agent_started = 0.0
+        self._agent_first_event: float | None = None
+        self._agent_usage: dict = {}
+
+    def _agent_stats(self, name: str) -> dict:
+        return self.agents.setdefault(
+            name, {"runs": 0, "wall_seconds": 0.0, "time_to_first_event": None}
+        )
+
+    def _tool_stats(self, name: str) -> dict:
+        return self.tools.setdefault(
+            name, {"calls": 0, "coalesced": 0, "wall_seconds": 0.0, "max_seconds": 0.0}
+        )
+
+    def _close_agent(self, result, now: float) -> None:
+        if self._agent is None:
+            return
+        stats = self._agent_stats(self._agent)
+        stats["runs"] += 1
+        stats["wall_seconds"] += now - self._agent_started
+        if self._agent_first_event is not None and stats["time_to_first_event"] is None:
+            stats["time_to_first_event"] = self._agent_first_event - self._agent_started
+        usage = _usage(result)
+        _add(stats, {k: v - self._agent_usage.get(k, 0) for k, v in usage.items()})
+        self._agent_usage = usage
+        self._agent = None
+
+    def observe(self, event, result) -> None:
+        """Record one event from RunResultStreaming.stream_events()."""
+        now = time.perf_counter()
+        if self.first_event is None:
+            self.first_event = now
+        if event.type == "agent_updated_stream_event":
+            self._close_agent(result, now)
+            self._agent = event.new_agent.name
+            self._agent_started = now
+            self._agent_first_event = None
+        elif event.type == "raw_response_event":
+            if self._agent_first_event is None:
+                self._agent_first_event = now
+
+    def finish(self, result) -> None:
+        """Close the last agent span once the stream has ended."""
+        self._close_agent(result, time.perf_counter())
+
+    def record_tool_time(
+        self, tool_name: str, seconds: float, coalesced: bool = False
+    ) -> None:
+        stats = self._tool_stats(tool_name)
+        stats["calls"] += 1
+        stats["coalesced"] += int(coalesced)
+        stats["wall_seconds"] += seconds
+        stats["max_seconds"] = max(stats["max_seconds"], seconds)
+
+    def record_tool_run(self, tool_name: str, result) -> None:
+        """Add the token usage of an agent-as-tool run."""
+        _add(self._tool_stats(tool_name), _usage(result))
+
+    def record_agent_run(self, agent_name: str, seconds: float, result) -> None:
+        """Record a whole non-streamed Runner.run (e.g. in pipeline mode)."""
+        stats = self._agent_stats(agent_name)
+        stats["runs"] += 1
+        stats["wall_seconds"] += seconds
+        _add(stats, _usage(result))
+
+    def record_search(self, seconds: float, cached: bool, coalesced: bool = False) -> None:
+        self.searches["count"] += 1
+        self.searches["cached"] += int(cached)
+        self.searches["coalesced"] += int(coalesced)
+        self.searches["total_seconds"] += seconds
+        self.searches["max_seconds"] = max(self.searches["max_seconds"], seconds)
+
+    def report(self) -> dict:
+        """Metrics for the saved report, rounded for readability."""
+
+        def rounded(stats: dict) -> dict:
+            return {
+                k: round(v, 3) if isinstance(v, float) else v for k, v in stats.items()
+            }
+
+        return {
+            "total_seconds": round(time.perf_counter() - self.started, 3),
+            "time_to_first_event": (
+                round(self.first_event - self.started, 3)
+                if self.first_event is not None
+                else None
+            ),
+            "agents": {name: rounded(s) for name, s in self.agents.items()},
+            "tools": {name: rounded(s) for name, s in self.tools.items()},
+            "searches": rounded(self.searches),
+        }
+
+    def write_prometheus(self, path: str | Path) -> Path:
+        """Write the metrics in Prometheus text exposition format."""
+        report = self.report()
+        lines = [
+            "# TYPE battlelens_run_seconds gauge",
+            f"battlelens_run_seconds {report['total_seconds']}",
+        ]
+        for kind, label in (("agents", "agent"), ("tools", "tool")):
+            for metric in ("wall_seconds", "total_tokens", "calls", "runs"):
+                samples = [
+                    (name, stats[metric])
+                    for name, stats in report[kind].items()
+                    if stats.get(metric) is not None
+                ]
+                if not samples:
+                    continue
+                lines.append(f"# TYPE battlelens_{label}_{metric} gauge")
+                for name, value in samples:
+                    lines.append(f'battlelens_{label}_{metric}{{{label}="{name}"}} {value}')
+        for metric, value in report["searches"].items():
+            lines.append(f"# TYPE battlelens_search_{metric} gauge")
+            lines.append(f"battlelens_search_{metric} {value}")
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        return path
+
+
+def set_metrics(metrics: "MetricsCollector | None"):
+    """Make metrics the active collector for the current run (task context)."""
+    return _current_metrics.set(metrics)
+
+
+def get_metrics() -> "MetricsCollector | None":
+    return _current_metrics.get()
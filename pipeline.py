@@ -0,0 +1,232 @@
+import json
+import time
+import asyncio
+import argparse
+from agents import Runner
+from tools_agents import (
+    military_agent,
+    economic_agent,
+    sentiment_agent,
+    ReflectionAgent,
+    CitationsAgent,
+    coalesced_call,
+)
+from main import prediction_agent, calculate_progress
+from clients import close_clients
+from reports import ReportWriter
+from scoring import SENSITIVITY, score_pair, sensitivity_pair, format_prediction
+from budget import RunBudget, set_budget, get_budget, budget_instructions
+from metrics import MetricsCollector, set_metrics, get_metrics
+from sources import SourceRegistry, set_sources
+from history import record_prediction
+
+# 🧭 Data agents keyed by the tool names used in PROGRESS_STEPS
+DATA_AGENTS = {
+    "military_data_agent": military_agent,
+    "economic_data_agent": economic_agent,
+    "sentiment_data_agent": sentiment_agent,
+}
+
+instructions = """
+You are the Lead Prediction Agent.
+The military, economic and sentiment data for both countries has already been
+collected and is given to you as JSON. Do not ask for more data.
+
+The win probabilities have already been computed by the local weighted scoring
+model and are given to you as "scores" (per-dimension shares included):
+  - Military Strength = 40%
+  - Economy & Resources = 30%
+  - Public Sentiment = 20%
+  - Geography/Allies (qualitative factor) = 10%
+
+Instructions:
+- Call ReflectionAgent and CitationsAgent as many time as you need (tools disappear once the run's budget is used up).
+- If a data section contains an "error", treat that dimension as unknown.
+- Report the probabilities exactly as given in "scores". Do not recalculate them;
+  your job is to explain them from the data.
+
+- Output a final report in natural language with these sections:
+  1. **Prediction**: Probability percentages for each country.
+  2. Output prediction is in following formate:
+  Country1: 90%
+  Country2: 10%
+"""
+
+pipeline_prediction_agent = prediction_agent.clone(
+    instructions=budget_instructions(instructions),
+    tools=[CitationsAgent, ReflectionAgent],
+)
+
+
+async def _run_data_agent(
+    tool_name: str, countries: str, _print: bool, report: ReportWriter | None = None
+) -> dict:
+    started = time.perf_counter()
+    try:
+        # Identical requests in flight (e.g. from concurrent batch pairs) share one run
+        key = ("pipeline", tool_name, " ".join(countries.lower().split()))
+        result, coalesced = await coalesced_call(
+            key, Runner.run, DATA_AGENTS[tool_name], countries
+        )
+        if get_budget() is not None and not coalesced:
+            get_budget().record_run(result)
+        if get_metrics() is not None and not coalesced:
+            get_metrics().record_agent_run(
+                result.last_agent.name, time.perf_counter() - started, result
+            )
+        output = result.final_output.model_dump()
+    except Exception as e:
+        output = {"error": f"{tool_name} failed: {e}"}
+    if report is not None:
+        report.write_item("agent_outputs", {"agent": tool_name, "output": output})
+    calculate_progress(tool_name, _print=_print)
+    return output
+
+
+async def gather_country_data(
+    country1: str,
+    country2: str | None = None,
+    _print: bool = True,
+    report: ReportWriter | None = None,
+    tools: list[str] | None = None,
+) -> dict:
+    """
+    Run the military, economic and sentiment agents (or only the given
+    tools) concurrently and return their validated outputs, as dicts,
+    keyed by tool name. Pass only country1 to collect a single country's
+    profile. Each output is written to report as soon as its agent finishes.
+    """
+    tools = tools or list(DATA_AGENTS)
+    if country2 is None:
+        countries = f"Country: {country1}"
+    else:
+        countries = f"Countries: {country1} and {country2}"
+    outputs = await asyncio.gather(
+        *(_run_data_agent(name, countries, _print, report) for name in tools)
+    )
+    return dict(zip(tools, outputs))
+
+
+def pair_data(profiles: dict, country1: str, country2: str) -> dict:
+    """Combine two single-country profiles into two-country agent outputs."""
+    data = {}
+    for name in DATA_AGENTS:
+        first, second = profiles[country1][name], profiles[country2][name]
+        if "error" in first or "error" in second:
+            data[name] = {"error": first.get("error") or second.get("error")}
+        else:
+            data[name] = {"country1": first["country1"], "country2": second["country1"]}
+    return data
+
+
+async def predict_from_data(
+    country1: str,
+    country2: str,
+    data: dict,
+    narrative: bool = True,
+    weights: dict | None = None,
+) -> dict:
+    """
+    Score already collected data locally and, if narrative is set,
+    ask the Prediction Agent to explain the result. With SENSITIVITY the
+    Monte Carlo spread of the scores is added (no LLM calls). The scores
+    and metrics are recorded in the prediction history.
+    """
+    scores = score_pair(country1, country2, data, weights)
+    prediction = format_prediction(country1, country2, scores)
+    sensitivity = None
+    if SENSITIVITY:
+        sensitivity = sensitivity_pair(country1, country2, data, weights)
+    if narrative:
+        started = time.perf_counter()
+        result = await Runner.run(
+            pipeline_prediction_agent,
+            json.dumps(
+                {
+                    "country1": country1,
+                    "country2": country2,
+                    "scores": scores,
+                    "data": data,
+                },
+                ensure_ascii=False,
+            ),
+        )
+        if get_budget() is not None:
+            get_budget().record_run(result)
+        if get_metrics() is not None:
+            get_metrics().record_agent_run(
+                result.last_agent.name, time.perf_counter() - started, result
+            )
+        prediction = result.final_output
+    record_prediction(country1, country2, scores[country1] / 100, data)
+    return {"prediction": prediction, "scores": scores, "sensitivity": sensitivity}
+
+
+async def run_pipeline(
+    country1: str,
+    country2: str,
+    _print: bool = True,
+    narrative: bool = True,
+    budget: RunBudget | None = None,
+    report: ReportWriter | None = None,
+    gather=gather_country_data,
+) -> dict:
+    """
+    Collect all data up front, score it locally and (optionally) ask
+    the Prediction Agent for the narrative in a single run. gather
+    collects the data; pass SnapshotStore.gather_pair to reuse fresh
+    per-country snapshots.
+    Returns {"prediction", "scores", "sensitivity", "data", "citations",
+    "budget", "metrics"};
+    the same sections are streamed to report while the run progresses.
+    """
+    budget = budget or RunBudget()
+    set_budget(budget)
+    metrics = MetricsCollector()
+    set_metrics(metrics)
+    sources = SourceRegistry()
+    set_sources(sources)
+    data = await gather(country1, country2, _print, report)
+    result = await predict_from_data(country1, country2, data, narrative)
+    result = {
+        **result,
+        "data": data,
+        "citations": sources.citations(),
+        "budget": budget.report(),
+        "metrics": metrics.report(),
+    }
+    if report is not None:
+        report.write_section("scores", result["scores"])
+        if result["sensitivity"] is not None:
+            report.write_section("sensitivity", result["sensitivity"])
+        report.write_section("analysis_result", result["prediction"])
+        for key in ("citations", "budget", "metrics"):
+            report.write_section(key, result[key])
+    return result
+
+
+async def main(country1: str, country2: str, narrative: bool = True):
+    with ReportWriter(f"{country1} vs {country2}") as report:
+        result = await run_pipeline(
+            country1, country2, narrative=narrative, report=report
+        )
+        json_file, txt_file = report.close()
+    print(f"\n\n{result['prediction']}")
+    print(f"\n📄 Text report saved: {txt_file}")
+    print(f"📊 JSON report saved: {json_file}")
+    await close_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare two countries with the parallel data pipeline."
+    )
+    parser.add_argument("country1")
+    parser.add_argument("country2")
+    parser.add_argument(
+        "--no-narrative",
+        action="store_true",
+        help="only print the locally scored probabilities (no Prediction Agent call)",
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.country1, args.country2, not args.no_narrative))
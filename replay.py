@@ -0,0 +1,410 @@
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+from pathlib import Path
+from agents.models.interface import Model
+from agents.items import ModelResponse
+from agents.usage import Usage
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseFunctionToolCall,
+    ResponseOutputMessage,
+    ResponseOutputText,
+    ResponseUsage,
+)
+from openai.types.responses.response_usage import (
+    InputTokensDetails,
+    OutputTokensDetails,
+)
+from clients import get_tavily_client
+from search_cache import normalize_query
+
+# 🎞️ Offline stand-ins for the LLM and Tavily clients.
+# Recordings file layout:
+# {"models": {"<agent>|<turn>": {"output": [...], "usage": {...}}},
+#  "searches": {"<normalized query>": {...tavily response...}}}
+
+_AGENT_NAME = re.compile(r"You are the ([^.\n]+)")
+_COUNTRY_SPLIT = re.compile(r"\s+(?:and|vs\.?|versus|against)\s+|\s*,\s*", re.I)
+
+
+def agent_key(system_instructions: str | None) -> str:
+    """Identify the calling agent from its instructions ("You are the ...")."""
+    match = _AGENT_NAME.search(system_instructions or "")
+    return match.group(1).strip() if match else "Agent"
+
+
+def _items(input) -> list:
+    if isinstance(input, str):
+        return [{"role": "user", "content": input}]
+    return [item if isinstance(item, dict) else item.model_dump() for item in input]
+
+
+def turn_key(system_instructions: str | None, input) -> str:
+    """Recording key: agent plus how many tool results it has seen so far."""
+    outputs = sum(
+        1 for item in _items(input) if item.get("type") == "function_call_output"
+    )
+    return f"{agent_key(system_instructions)}|{outputs}"
+
+
+def _countries(items: list) -> tuple[str, str | None]:
+    """Best-effort guess of the countries from the first user message."""
+    for item in items:
+        if item.get("role") != "user" or not isinstance(item.get("content"), str):
+            continue
+        text = item["content"].strip()
+        try:
+            data = json.loads(text)
+            return data["country1"], data.get("country2")
+        except (ValueError, TypeError, KeyError):
+            pass
+        text = re.sub(r"^countr(?:y|ies)\s*:\s*", "", text, flags=re.I)
+        names = [n.strip(" .") for n in _COUNTRY_SPLIT.split(text) if n.strip(" .")]
+        if len(names) >= 2:
+            return names[0], names[1]
+        if names:
+            return names[0], None
+    return "Country1", "Country2"
+
+
+def _stable_int(*parts: str, low: int = 10, high: int = 10000) -> int:
+    digest = hashlib.sha256("|".join(parts).encode()).digest()
+    return low + int.from_bytes(digest[:4], "big") % (high - low)
+
+
+def _sample(
+    schema: dict, defs: dict, country: str | None, field: str = "", second: str | None = None
+):
+    """Deterministic placeholder value that satisfies a JSON schema."""
+    if "$ref" in schema:
+        schema = defs[schema["$ref"].split("/")[-1]]
+        return _sample(schema, defs, country, field, second)
+    if "anyOf" in schema:
+        options = [s for s in schema["anyOf"] if s.get("type") != "null"]
+        if not options or country is None:
+            return None
+        return _sample(options[0], defs, country, field, second)
+    kind = schema.get("type")
+    if kind == "object":
+        value = {}
+        for name, prop in schema.get("properties", {}).items():
+            sub_country = {"country1": country, "country2": second}.get(name, country)
+            value[name] = _sample(prop, defs, sub_country, name, second)
+        return value
+    if kind == "array":
+        return [_sample(schema.get("items", {}), defs, country, field, second)]
+    if kind == "integer":
+        return _stable_int(country or "", field)
+    if kind == "number":
+        return float(_stable_int(country or "", field))
+    if kind == "boolean":
+        return True
+    if field == "country":
+        return country or "unknown"
+    return ["low", "medium", "high"][_stable_int(country or "", field, low=0, high=3)]
+
+
+def _tool_call(name: str, arguments: dict, n: int) -> ResponseFunctionToolCall:
+    return ResponseFunctionToolCall(
+        type="function_call",
+        id=f"fc_replay_{n}",
+        call_id=f"call_replay_{n}",
+        name=name,
+        arguments=json.dumps(arguments),
+    )
+
+
+def _message(text: str) -> ResponseOutputMessage:
+    return ResponseOutputMessage(
+        id="msg_replay",
+        type="message",
+        role="assistant",
+        status="completed",
+        content=[ResponseOutputText(type="output_text", text=text, annotations=[])],
+    )
+
+
+def output_item(data: dict):
+    """Rebuild a recorded model output item (message or function call)."""
+    if data.get("type") == "function_call":
+        return ResponseFunctionToolCall.model_validate(data)
+    return ResponseOutputMessage.model_validate(data)
+
+
+class ReplayModel(Model):
+    """
+    Model that answers from recordings, or synthesizes a plausible turn
+    (handoff → each tool once → final answer) when nothing is recorded.
+    latency ± jitter seconds are slept before every response.
+    """
+
+    def __init__(
+        self,
+        recordings: dict | None = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        tokens: int = 500,
+    ):
+        self.recordings = (recordings or {}).get("models", {})
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens = tokens
+        self.calls = 0
+
+    async def _sleep(self) -> None:
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _synthesize(self, system_instructions, input, tools, output_schema, handoffs):
+        items = _items(input)
+        called = {item.get("name") for item in items if item.get("type") == "function_call"}
+        country1, country2 = _countries(items)
+        countries = f"{country1} and {country2}" if country2 else country1
+
+        if handoffs and not any(h.tool_name in called for h in handoffs):
+            target = handoffs[0]
+            arguments = {}
+            if target.input_json_schema.get("properties"):
+                arguments = {"country1": country1, "country2": country2}
+            return [_tool_call(target.tool_name, arguments, self.calls)]
+        for tool in tools:
+            if tool.name not in called:
+                properties = getattr(tool, "params_json_schema", {}).get("properties", {})
+                arguments = {name: countries for name in properties}
+                return [_tool_call(tool.name, arguments, self.calls)]
+
+        if output_schema is not None and not output_schema.is_plain_text():
+            schema = output_schema.json_schema()
+            value = _sample(schema, schema.get("$defs", {}), country1, second=country2)
+            return [_message(json.dumps(value))]
+        first = _stable_int(country1, str(country2), low=30, high=71)
+        return [
+            _message(
+                f"Prediction (replay):\n{country1}: {first}%\n"
+                f"{country2 or 'Country2'}: {100 - first}%"
+            )
+        ]
+
+    async def get_response(
+        self,
+        system_instructions,
+        input,
+        model_settings,
+        tools,
+        output_schema,
+        handoffs,
+        tracing,
+        **kwargs,
+    ) -> ModelResponse:
+        self.calls += 1
+        await self._sleep()
+        recorded = self.recordings.get(turn_key(system_instructions, input))
+        if recorded is not None:
+            output = [output_item(item) for item in recorded["output"]]
+            usage = Usage(requests=1, **recorded.get("usage", {}))
+        else:
+            output = self._synthesize(
+                system_instructions, input, tools, output_schema, handoffs
+            )
+            usage = Usage(
+                requests=1,
+                input_tokens=self.tokens,
+                output_tokens=self.tokens // 5,
+                total_tokens=self.tokens + self.tokens // 5,
+            )
+        return ModelResponse(output=output, usage=usage, response_id=None)
+
+    async def stream_response(self, *args, **kwargs):
+        response = await self.get_response(*args, **kwargs)
+        yield completed_event(response)
+
+
+def completed_event(response: ModelResponse) -> ResponseCompletedEvent:
+    """The single stream event that carries a whole ModelResponse."""
+    return ResponseCompletedEvent(
+        type="response.completed",
+        sequence_number=0,
+        response=Response(
+            id="resp_replay",
+            created_at=time.time(),
+            model="replay",
+            object="response",
+            output=response.output,
+            tool_choice="auto",
+            tools=[],
+            parallel_tool_calls=False,
+            usage=ResponseUsage(
+                input_tokens=response.usage.input_tokens,
+                output_tokens=response.usage.output_tokens,
+                total_tokens=response.usage.total_tokens,
+                input_tokens_details=InputTokensDetails(cached_tokens=0),
+                output_tokens_details=OutputTokensDetails(reasoning_tokens=0),
+            ),
+        ),
+    )
+
+
+class ReplayTavilyClient:
+    """Drop-in for AsyncTavilyClient that serves recorded or synthetic results."""
+
+    def __init__(
+        self, recordings: dict | None = None, latency: float = 0.0, jitter: float = 0.0
+    ):
+        self.recordings = (recordings or {}).get("searches", {})
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = 0
+
+    async def search(self, query: str, **kwargs) -> dict:
+        self.calls += 1
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        recorded = self.recordings.get(normalize_query(query))
+        if recorded is not None:
+            return recorded
+        slug = re.sub(r"[^a-z0-9]+", "-", normalize_query(query)).strip("-")
+        return {
+            "query": query,
+            "results": [
+                {
+                    "title": f"Replay result {i} for {query}",
+                    "url": f"https://replay.example/{slug}/{i}",
+                    "content": f"Synthetic content {i} about {query}.",
+                    "score": round(0.9 - 0.1 * i, 2),
+                }
+                for i in range(3)
+            ],
+            "response_time": round(max(delay, 0.0), 3),
+        }
+
+
+class Recorder:
+    """Collects live model and search responses into a recordings file."""
+
+    def __init__(self):
+        self.data = {"models": {}, "searches": {}}
+
+    def save(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.data, indent=2, ensure_ascii=False), "utf-8")
+        return path
+
+
+class RecordingModel(Model):
+    """Wraps a live model and records each response under its turn key."""
+
+    def __init__(self, model: Model, recorder: Recorder):
+        self.model = model
+        self.recorder = recorder
+
+    def _record(self, system_instructions, input, output, usage) -> None:
+        self.recorder.data["models"][turn_key(system_instructions, input)] = {
+            "output": [item.model_dump(exclude_unset=True) for item in output],
+            "usage": {
+                "input_tokens": usage.input_tokens,
+                "output_tokens": usage.output_tokens,
+                "total_tokens": usage.total_tokens,
+            },
+        }
+
+    async def get_response(self, system_instructions, input, *args, **kwargs):
+        response = await self.model.get_response(system_instructions, input, *args, **kwargs)
+        self._record(system_instructions, input, response.output, response.usage)
+        return response
+
+    async def stream_response(self, system_instructions, input, *args, **kwargs):
+        async for event in self.model.stream_response(
+            system_instructions, input, *args, **kwargs
+        ):
+            if isinstance(event, ResponseCompletedEvent) and event.response.usage:
+                self._record(
+                    system_instructions, input, event.response.output, event.response.usage
+                )
+            yield event
+
+
+class RecordingTavilyClient:
+    """Wraps a live Tavily client and records each search response."""
+
+    def __init__(self, client, recorder: Recorder):
+        self.client = client
+        self.recorder = recorder
+
+    async def search(self, query: str, **kwargs) -> dict:
+        response = await (self.client or get_tavily_client()).search(query, **kwargs)
+        self.recorder.data["searches"][normalize_query(query)] = response
+        return response
+
+
+def graph_agents() -> list:
+    """Every agent in the main and pipeline graphs."""
+    import main
+    import pipeline
+    import tools_agents
+
+    return [
+        main.RequirementGatheringAgent,
+        main.planning_agent,
+        main.prediction_agent,
+        pipeline.pipeline_prediction_agent,
+        tools_agents.agent,
+        tools_agents.military_agent,
+        tools_agents.economic_agent,
+        tools_agents.sentiment_agent,
+        tools_agents.reflection_agent,
+    ]
+
+
+def load_recordings(path: str | Path | None) -> dict:
+    if path is None:
+        return {}
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def install_replay(
+    recordings: dict | None = None,
+    llm_latency: float = 0.0,
+    search_latency: float = 0.0,
+    jitter: float = 0.0,
+) -> tuple[ReplayModel, ReplayTavilyClient]:
+    """
+    Swap every agent's model and the Tavily client for replay stand-ins.
+    The search cache is turned off so every run pays the search latency,
+    and replayed predictions are kept out of the prediction history.
+    """
+    import history
+    import tools_agents
+
+    model = ReplayModel(recordings, llm_latency, jitter)
+    for agent in graph_agents():
+        agent.model = model
+    search_client = ReplayTavilyClient(recordings, search_latency, jitter)
+    tools_agents.client = search_client
+    tools_agents.search_cache = None
+    history.HISTORY = False
+    return model, search_client
+
+
+def install_recorder() -> Recorder:
+    """
+    Wrap the live models and Tavily client so a run can be recorded.
+    The search cache is turned off so every search reaches the recorder.
+    """
+    import tools_agents
+
+    recorder = Recorder()
+    for agent in graph_agents():
+        if not isinstance(agent.model, RecordingModel):
+            agent.model = RecordingModel(agent.model, recorder)
+    # None (the shared lazy client) is resolved by the wrapper on each search
+    tools_agents.client = RecordingTavilyClient(tools_agents.client, recorder)
+    tools_agents.search_cache = None
+    return recorder
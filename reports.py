@@ -1,22 +1,107 @@
+import os
 import json
+import asyncio
+import sqlite3
 from datetime import datetime
 from pathlib import Path
+from agents import SQLiteSession
 
-async def generate_report(session, final_result, user_input):
+
+# 🗂️ Conversation history (REPORT_HISTORY_LIMIT keeps only the latest N items)
+REPORT_HISTORY_LIMIT = int(os.getenv("REPORT_HISTORY_LIMIT", "0")) or None
+HISTORY_PAGE_SIZE = 200
+HISTORY_TEXT_CHARS = 200
+
+
+def _read_page(session, after_id, page_size, first_id):
+    with sqlite3.connect(session.db_path) as conn:
+        return conn.execute(
+            f"""
+            SELECT id, message_data FROM {session.messages_table}
+            WHERE session_id = ? AND id > ? AND id >= ?
+            ORDER BY id ASC
+            LIMIT ?
+            """,
+            (session.session_id, after_id, first_id, page_size),
+        ).fetchall()
+
+
+def _first_id(session, limit):
+    with sqlite3.connect(session.db_path) as conn:
+        row = conn.execute(
+            f"""
+            SELECT id FROM {session.messages_table}
+            WHERE session_id = ?
+            ORDER BY id DESC
+            LIMIT 1 OFFSET ?
+            """,
+            (session.session_id, limit - 1),
+        ).fetchone()
+    return row[0] if row else 0
+
+
+async def conversation_history(session, limit=None, page_size=HISTORY_PAGE_SIZE):
+    """
+    Yield the session's conversation items oldest first, at most limit
+    of the latest ones. File-backed SQLiteSessions are read page by page
+    so a long session is never loaded into memory at once.
+    """
+    if session is None:
+        return
+    if not isinstance(session, SQLiteSession) or str(session.db_path) == ":memory:":
+        for item in await session.get_items(limit):
+            yield item
+        return
+
+    first_id = await asyncio.to_thread(_first_id, session, limit) if limit else 0
+    after_id = 0
+    while True:
+        rows = await asyncio.to_thread(_read_page, session, after_id, page_size, first_id)
+        for row_id, message_data in rows:
+            try:
+                yield json.loads(message_data)
+            except json.JSONDecodeError:
+                continue
+        if len(rows) < page_size:
+            return
+        after_id = rows[-1][0]
+
+
+def summarize_item(item):
+    """One short line describing a conversation item."""
+    if not isinstance(item, dict):
+        return _shorten(str(item))
+    kind = item.get("type", "message")
+    if kind == "function_call":
+        return _shorten(f"tool call: {item.get('name')}({item.get('arguments', '')})")
+    if kind == "function_call_output":
+        return _shorten(f"tool output: {item.get('output', '')}")
+    content = item.get("content", "")
+    if isinstance(content, list):
+        content = " ".join(
+            part.get("text", "") for part in content if isinstance(part, dict)
+        )
+    return _shorten(f"{item.get('role', kind)}: {content}")
+
+
+def _shorten(text):
+    text = " ".join(str(text).split())
+    if len(text) > HISTORY_TEXT_CHARS:
+        text = text[:HISTORY_TEXT_CHARS - 1] + "…"
+    return text
+
+
+async def generate_report(
+    session, final_result, user_input, budget=None, metrics=None, citations=None
+):
     """Generate a comprehensive report of the analysis"""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
+
     # Get conversation history from session if available
-    conversation_data = []
-    try:
-        # Assuming session has a method to get conversation history
-        if hasattr(session, 'get_conversation_history'):
-            conversation_data = session.get_conversation_history()
-        elif hasattr(session, 'messages'):
-            conversation_data = session.messages
-    except:
-        pass
-    
+    conversation_data = [
+        item async for item in conversation_history(session, REPORT_HISTORY_LIMIT)
+    ]
+
     report = {
         "metadata": {
             "timestamp": timestamp,
@@ -30,45 +115,241 @@ async def generate_report(session, final_result, user_input):
             "total_interactions": len(conversation_data) if conversation_data else 0
         }
     }
-    
+    if citations is not None:
+        report["citations"] = citations
+    if budget is not None:
+        report["budget"] = budget
+    if metrics is not None:
+        report["metrics"] = metrics
+
     return report
 
+
+# 🖋️ Text rendering of each report section
+def _text_metadata(metadata):
+    return (
+        "=" * 60 + "\n"
+        "COUNTRY COMPARISON ANALYSIS REPORT\n"
+        + "=" * 60 + "\n\n"
+        f"Generated: {metadata['timestamp']}\n"
+        f"User Query: {metadata['user_query']}\n\n"
+    )
+
+
+def _text_citations(citations):
+    return "".join(
+        f"[{source['id']}] {source['title']}. {source['url']} "
+        f"(accessed {source['accessed']})\n"
+        for source in citations
+    )
+
+
+def _text_budget(budget):
+    return "".join(f"{key}: {value}\n" for key, value in budget.items())
+
+
+def _text_metrics(metrics):
+    lines = [f"Total time: {metrics['total_seconds']}s\n"]
+    for section in ('agents', 'tools'):
+        for name, stats in metrics[section].items():
+            lines.append(
+                f"{name}: {stats.get('wall_seconds', 0)}s, "
+                f"{stats.get('total_tokens', 0)} tokens\n"
+            )
+    searches = metrics['searches']
+    lines.append(
+        f"Searches: {searches['count']} ({searches['cached']} cached), "
+        f"{searches['total_seconds']}s total\n"
+    )
+    return "".join(lines)
+
+
+def _text_sensitivity(sensitivity):
+    countries = [k for k, v in sensitivity.items() if isinstance(v, dict)]
+    lines = [
+        f"{c}: {sensitivity[c]['mean']}% "
+        f"({sensitivity['interval']}% interval {sensitivity[c]['low']}-{sensitivity[c]['high']}%), "
+        f"ahead in {sensitivity[c]['ahead']}% of {sensitivity['samples']} samples\n"
+        for c in countries
+    ]
+    lines.append(f"Most sensitive inputs ({countries[0]}, low -> high):\n")
+    for bar in sensitivity['tornado']:
+        lines.append(
+            f"  {bar['input']}: {bar['low']}% -> {bar['high']}% ({bar['swing']} pts)\n"
+        )
+    return "".join(lines)
+
+
+def _text_agent_output(item):
+    output = item['output']
+    if not isinstance(output, str):
+        output = json.dumps(output, ensure_ascii=False)
+    return f"{item['agent']}: {output}\n"
+
+
+TEXT_SECTIONS = {
+    # key: (heading, render)
+    "analysis_result": ("ANALYSIS RESULT", lambda value: f"{value}\n"),
+    "scores": ("SCORES", lambda value: json.dumps(value, ensure_ascii=False) + "\n"),
+    "sensitivity": ("SENSITIVITY", _text_sensitivity),
+    "citations": ("SOURCES", _text_citations),
+    "budget": ("BUDGET", _text_budget),
+    "metrics": ("METRICS", _text_metrics),
+    "summary": ("SUMMARY", lambda value: f"Total interactions: {value['total_interactions']}\n"),
+}
+TEXT_ITEMS = {
+    "agent_outputs": ("AGENT OUTPUTS", _text_agent_output),
+    "conversation_history": ("CONVERSATION HISTORY", lambda item: summarize_item(item) + "\n"),
+}
+
+
+class ReportWriter:
+    """
+    Writes a report section by section while the run progresses.
+    Sections are appended (and fsynced) to <name>.json.partial, a JSON
+    Lines journal, and to <name>.txt.partial, so a crash leaves a
+    readable partial report behind. close() streams the journal into
+    <name>.json one section at a time and renames both files into place.
+    """
+
+    def __init__(self, user_input, filename=None, reports_dir="reports"):
+        now = datetime.now()
+        if filename is None:
+            filename = f"country_comparison_report_{now.strftime('%Y%m%d_%H%M%S')}"
+        reports_dir = Path(reports_dir)
+        reports_dir.mkdir(parents=True, exist_ok=True)
+        self.json_file = reports_dir / f"{filename}.json"
+        self.txt_file = reports_dir / f"{filename}.txt"
+        self._journal_path = reports_dir / f"{filename}.json.partial"
+        self._txt_path = reports_dir / f"{filename}.txt.partial"
+        self._journal = open(self._journal_path, "w", encoding="utf-8")
+        self._txt = open(self._txt_path, "w", encoding="utf-8")
+        self._item_counts = {}
+        self._text_section = None
+        self.timestamp = now.strftime("%Y-%m-%d %H:%M:%S")
+        self.closed = False
+
+        metadata = {
+            "timestamp": self.timestamp,
+            "user_query": user_input,
+            "report_type": "Country Comparison Analysis",
+        }
+        self._append({"key": "metadata", "value": metadata}, _text_metadata(metadata))
+
+    def _append(self, entry, text, sync=True):
+        self._journal.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        self._txt.write(text)
+        for f in (self._journal, self._txt):
+            f.flush()
+            if sync:
+                os.fsync(f.fileno())
+
+    def write_section(self, key, value):
+        """Add a whole section (e.g. the prediction, budget or metrics)."""
+        heading, render = TEXT_SECTIONS.get(
+            key, (key.upper().replace("_", " "), lambda v: f"{v}\n")
+        )
+        text = ("\n" if self._text_section else "") + f"{heading}:\n"
+        text += "-" * 30 + "\n" + render(value) + "\n"
+        self._text_section = None
+        self._append({"key": key, "value": value}, text)
+
+    def write_item(self, key, item):
+        """Append one item to a list section (e.g. agent_outputs)."""
+        heading, render = TEXT_ITEMS.get(
+            key, (key.upper().replace("_", " "), lambda v: f"{v}\n")
+        )
+        count = self._item_counts.get(key, 0) + 1
+        self._item_counts[key] = count
+        text = ""
+        if self._text_section != key:
+            text = ("\n" if self._text_section else "") + f"{heading}:\n" + "-" * 30 + "\n"
+            self._text_section = key
+        if key == "conversation_history":
+            text += f"{count}. "
+        # Items are flushed but not fsynced; the next section syncs them
+        self._append({"key": key, "item": item}, text + render(item), sync=False)
+
+    def write_items(self, key, items):
+        for item in items:
+            self.write_item(key, item)
+
+    async def write_conversation_history(self, session, limit=REPORT_HISTORY_LIMIT):
+        """Stream the session's items into the conversation_history section."""
+        async for item in conversation_history(session, limit):
+            self.write_item("conversation_history", item)
+
+    def _journal_entries(self):
+        with open(self._journal_path, encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def close(self):
+        """Finish the report; returns (json_file, txt_file)."""
+        if self.closed:
+            return self.json_file, self.txt_file
+        self.write_section(
+            "summary",
+            {
+                "generated_at": self.timestamp,
+                "total_interactions": self._item_counts.get("conversation_history", 0),
+            },
+        )
+        self._txt.write("=" * 60 + "\n")
+        self._txt.write("End of Report\n")
+        self._journal.close()
+        self._txt.close()
+
+        # Key order follows first appearance; list sections are gathered
+        # with one pass over the journal each so no section is held twice.
+        keys = list(dict.fromkeys(entry["key"] for entry in self._journal_entries()))
+        tmp_file = self.json_file.with_suffix(".json.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as out:
+            out.write("{")
+            for i, key in enumerate(keys):
+                out.write(("," if i else "") + f"\n  {json.dumps(key)}: ")
+                if key in self._item_counts:
+                    out.write("[")
+                    n = 0
+                    for entry in self._journal_entries():
+                        if entry["key"] == key and "item" in entry:
+                            out.write(("," if n else "") + "\n    ")
+                            out.write(json.dumps(entry["item"], ensure_ascii=False, default=str))
+                            n += 1
+                    out.write("\n  ]" if n else "]")
+                else:
+                    value = None
+                    for entry in self._journal_entries():
+                        if entry["key"] == key:
+                            value = entry["value"]
+                    out.write(json.dumps(value, ensure_ascii=False, default=str))
+            out.write("\n}\n")
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_file, self.json_file)
+        os.replace(self._txt_path, self.txt_file)
+        self._journal_path.unlink()
+        self.closed = True
+        return self.json_file, self.txt_file
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if not self.closed:
+            self._journal.close()
+            self._txt.close()
+        return False
+
+
 def save_report(report, filename=None):
     """Save report to file in multiple formats"""
-    if filename is None:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"country_comparison_report_{timestamp}"
-    
-    # Create reports directory if it doesn't exist
-    reports_dir = Path("reports")
-    reports_dir.mkdir(exist_ok=True)
-    
-    # Save as JSON
-    json_file = reports_dir / f"{filename}.json"
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(report, f, indent=2, ensure_ascii=False)
-    
-    # Save as readable text report
-    txt_file = reports_dir / f"{filename}.txt"
-    with open(txt_file, 'w', encoding='utf-8') as f:
-        f.write("=" * 60 + "\n")
-        f.write("COUNTRY COMPARISON ANALYSIS REPORT\n")
-        f.write("=" * 60 + "\n\n")
-        
-        f.write(f"Generated: {report['metadata']['timestamp']}\n")
-        f.write(f"User Query: {report['metadata']['user_query']}\n\n")
-        
-        f.write("ANALYSIS RESULT:\n")
-        f.write("-" * 30 + "\n")
-        f.write(f"{report['analysis_result']}\n\n")
-        
-        if report['conversation_history']:
-            f.write("CONVERSATION HISTORY:\n")
-            f.write("-" * 30 + "\n")
-            for i, interaction in enumerate(report['conversation_history'], 1):
-                f.write(f"{i}. {interaction}\n")
-        
-        f.write("\n" + "=" * 60 + "\n")
-        f.write("End of Report\n")
-    
-    return json_file, txt_file
+    writer = ReportWriter(report['metadata']['user_query'], filename)
+    for key, value in report.items():
+        if key in ('metadata', 'summary'):
+            continue
+        if key == 'conversation_history':
+            writer.write_items(key, value or [])
+        else:
+            writer.write_section(key, value)
+    return writer.close()
@@ -0,0 +1,239 @@
+import os
+import time
+import random
+import asyncio
+from collections import deque
+from contextvars import ContextVar
+import openai
+from agents.models.interface import Model
+
+# 🛡️ Retry, hedging and failover policy for LLM calls
+LLM_CALL_TIMEOUT = float(os.getenv("LLM_CALL_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+LLM_HEDGE = os.getenv("LLM_HEDGE", "1") != "0"
+LLM_HEDGE_MIN_SAMPLES = 20
+LLM_HEDGE_MIN_DELAY = 1.0
+BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+
+# Worth retrying on the same provider
+RETRYABLE_ERRORS = (
+    asyncio.TimeoutError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+# Not worth retrying, but another provider may still succeed
+FAILOVER_ERRORS = RETRYABLE_ERRORS + (
+    openai.AuthenticationError,
+    openai.PermissionDeniedError,
+    openai.NotFoundError,
+)
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    """
+    Opens after `failures` consecutive failures and rejects calls for
+    `cooldown` seconds; then lets one trial call through (half-open).
+    """
+
+    def __init__(self, failures: int = BREAKER_FAILURES, cooldown: float = BREAKER_COOLDOWN):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.opened_at: float | None = None
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial:
+            self._trial = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def release(self) -> None:
+        """End a call that was neither a success nor a provider failure."""
+        self._trial = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self._trial or self.consecutive_failures >= self.failures:
+            self.opened_at = time.monotonic()
+        self._trial = False
+
+
+class LatencyTracker:
+    """Recent successful call latencies, used to pick the hedge delay."""
+
+    def __init__(self, window: int = 200):
+        self.samples: deque = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def p95(self) -> float | None:
+        if len(self.samples) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)]
+
+
+# Shared per provider, so every model on a provider trips the same breaker
+breakers: dict[str, CircuitBreaker] = {}
+latencies: dict[str, LatencyTracker] = {}
+
+
+# Model that answered the last ResilientModel call in this task context
+_answering_model: ContextVar["str | None"] = ContextVar("answering_model", default=None)
+
+
+def set_answering_model(name: str | None):
+    return _answering_model.set(name)
+
+
+def get_answering_model() -> str | None:
+    """Name of the candidate that answered, e.g. to tell failover answers apart."""
+    return _answering_model.get()
+
+
+def _backoff(attempt: int) -> float:
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2**attempt))
+
+
+class ResilientModel(Model):
+    """
+    Calls the first provider whose circuit is closed, with a per-call
+    deadline and jittered exponential retries on transient errors; a
+    call slower than the provider's recent p95 is hedged with a second
+    identical request. When a provider keeps failing (or its circuit is
+    open) the next candidate model is tried.
+    candidates: [(provider, model)], e.g. Gemini first, then OpenAI.
+    """
+
+    def __init__(self, candidates: list[tuple[str, Model]]):
+        self.candidates = candidates
+
+    @property
+    def name(self) -> str:
+        return getattr(self.candidates[0][1], "name", "model")
+
+    def _available(self):
+        for provider, model in self.candidates:
+            breaker = breakers.setdefault(provider, CircuitBreaker())
+            if breaker.allow():
+                yield provider, model, breaker
+
+    async def _call(self, provider: str, model: Model, args, kwargs):
+        started = time.monotonic()
+        response = await asyncio.wait_for(
+            model.get_response(*args, **kwargs), LLM_CALL_TIMEOUT
+        )
+        latencies.setdefault(provider, LatencyTracker()).record(time.monotonic() - started)
+        return response
+
+    async def _hedged(self, provider: str, model: Model, args, kwargs):
+        first = asyncio.ensure_future(self._call(provider, model, args, kwargs))
+        delay = latencies.setdefault(provider, LatencyTracker()).p95() if LLM_HEDGE else None
+        if delay is None:
+            return await first
+        # Requests still running on return, error or cancellation are cancelled
+        pending = {first}
+        error = None
+        try:
+            done, _ = await asyncio.wait(pending, timeout=max(delay, LLM_HEDGE_MIN_DELAY))
+            if done:
+                return first.result()
+            pending.add(asyncio.ensure_future(self._call(provider, model, args, kwargs)))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def get_response(self, *args, **kwargs):
+        error: Exception = CircuitOpenError("every provider's circuit is open")
+        for provider, model, breaker in self._available():
+            for attempt in range(LLM_MAX_RETRIES + 1):
+                try:
+                    response = await self._hedged(provider, model, args, kwargs)
+                    breaker.record_success()
+                    set_answering_model(getattr(model, "name", provider))
+                    return response
+                except FAILOVER_ERRORS as e:
+                    breaker.record_failure()
+                    error = e
+                    if not isinstance(e, RETRYABLE_ERRORS) or not breaker.allow():
+                        break
+                    if attempt < LLM_MAX_RETRIES:
+                        await asyncio.sleep(_backoff(attempt))
+                except BaseException:
+                    # e.g. a bad request or cancellation: says nothing about
+                    # the provider, but a half-open trial must not stay taken
+                    breaker.release()
+                    raise
+        raise error
+
+    async def stream_response(self, *args, **kwargs):
+        # A stream can only be retried or failed over before its first event
+        error: Exception = CircuitOpenError("every provider's circuit is open")
+        for provider, model, breaker in self._available():
+            for attempt in range(LLM_MAX_RETRIES + 1):
+                stream = model.stream_response(*args, **kwargs)
+                started = False
+                try:
+                    first = await asyncio.wait_for(stream.__anext__(), LLM_CALL_TIMEOUT)
+                    started = True
+                    set_answering_model(getattr(model, "name", provider))
+                    yield first
+                    async for event in stream:
+                        yield event
+                    breaker.record_success()
+                    return
+                except StopAsyncIteration:
+                    breaker.record_success()
+                    return
+                except FAILOVER_ERRORS as e:
+                    breaker.record_failure()
+                    if started:
+                        raise
+                    error = e
+                    if not isinstance(e, RETRYABLE_ERRORS) or not breaker.allow():
+                        break
+                    if attempt < LLM_MAX_RETRIES:
+                        await asyncio.sleep(_backoff(attempt))
+                except BaseException:
+                    breaker.release()
+                    raise
+                finally:
+                    # An abandoned stream (e.g. a first-event timeout) is
+                    # closed before the next attempt or candidate
+                    await stream.aclose()
+        raise error
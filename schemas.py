@@ -0,0 +1,90 @@
+from pydantic import BaseModel, Field
+
+# 🧱 Structured outputs for the data agents.
+# Counts are null when the agent could not find a figure;
+# qualitative fields use "unknown" instead.
+
+
+class Airpower(BaseModel):
+    fighter_jets: int | None = Field(default=None)
+    bombers: int | None = Field(default=None)
+    helicopters: int | None = Field(default=None)
+    drones: int | None = Field(default=None)
+
+
+class LandForces(BaseModel):
+    tanks: int | None = Field(default=None)
+    armored_vehicles: int | None = Field(default=None)
+    artillery: int | None = Field(default=None)
+
+
+class NavalPower(BaseModel):
+    frigates: int | None = Field(default=None)
+    destroyers: int | None = Field(default=None)
+    submarines: int | None = Field(default=None)
+    aircraft_carriers: int | None = Field(default=None)
+
+
+class Logistics(BaseModel):
+    supply_trucks: int | None = Field(default=None)
+    fuel_reserves: str = Field(description="low, medium, high or unknown")
+    transport_aircraft: int | None = Field(default=None)
+
+
+class AvailableEquipment(BaseModel):
+    small_arms: int | None = Field(default=None)
+    support_gear: str = Field(description="low, medium, high or unknown")
+    general_weapons: str = Field(description="Short qualitative summary")
+
+
+class MilitaryProfile(BaseModel):
+    country: str
+    active_personnel: int | None = Field(default=None)
+    reserve_personnel: int | None = Field(default=None)
+    airpower: Airpower
+    land_forces: LandForces
+    naval_power: NavalPower
+    logistics: Logistics
+    available_equipment: AvailableEquipment
+
+
+class MilitaryData(BaseModel):
+    country1: MilitaryProfile
+    country2: MilitaryProfile | None = Field(
+        default=None, description="Null when only one country was requested"
+    )
+
+
+class EconomicProfile(BaseModel):
+    country: str
+    gdp: str
+    defense_spending: str
+    trade_balance: str
+    economic_growth: str
+    key_resources: str
+    wartime_resilience: str
+
+
+class EconomicData(BaseModel):
+    country1: EconomicProfile
+    country2: EconomicProfile | None = Field(
+        default=None, description="Null when only one country was requested"
+    )
+    comparison_summary: str = Field(
+        description="Which country is more economically sustainable for conflict"
+    )
+
+
+class SentimentProfile(BaseModel):
+    country: str
+    recent_news_sentiment: str
+    reports_of_protests: str
+    public_morale: str
+    political_stability: str
+
+
+class SentimentData(BaseModel):
+    country1: SentimentProfile
+    country2: SentimentProfile | None = Field(
+        default=None, description="Null when only one country was requested"
+    )
@@ -0,0 +1,456 @@
+import os
+import re
+from statistics import NormalDist
+import numpy as np
+
+# ⚖️ Weighted scoring model from the Prediction Agent instructions
+DEFAULT_WEIGHTS = {
+    "military": 0.4,
+    "economic": 0.3,
+    "sentiment": 0.2,
+    "geography": 0.1,
+}
+DIMENSIONS = ("military", "economic", "sentiment")
+WEIGHT_NAMES = (*DIMENSIONS, "geography")
+
+# 🎲 Monte Carlo sensitivity of the weighted model (override with environment variables)
+SENSITIVITY = os.getenv("SENSITIVITY", "1") != "0"
+SENSITIVITY_SAMPLES = int(os.getenv("SENSITIVITY_SAMPLES", "20000"))
+# Log-normal sigma of the multiplicative noise on every metric
+SENSITIVITY_NOISE = float(os.getenv("SENSITIVITY_NOISE", "0.2"))
+# Dirichlet concentration around the weights; higher means the weights vary less
+SENSITIVITY_CONCENTRATION = float(os.getenv("SENSITIVITY_CONCENTRATION", "40"))
+SENSITIVITY_INTERVAL = 0.9
+SENSITIVITY_TORNADO = 10
+
+# (dimension, tool name, field path, kind, weight inside the dimension)
+# kind tells extract_features how to turn the raw value into a number.
+FEATURES = [
+    ("military", "military_data_agent", "active_personnel", "count", 2.0),
+    ("military", "military_data_agent", "reserve_personnel", "count", 1.0),
+    ("military", "military_data_agent", "airpower.fighter_jets", "count", 1.5),
+    ("military", "military_data_agent", "airpower.bombers", "count", 0.5),
+    ("military", "military_data_agent", "airpower.helicopters", "count", 0.5),
+    ("military", "military_data_agent", "airpower.drones", "count", 0.5),
+    ("military", "military_data_agent", "land_forces.tanks", "count", 1.0),
+    ("military", "military_data_agent", "land_forces.armored_vehicles", "count", 0.5),
+    ("military", "military_data_agent", "land_forces.artillery", "count", 0.5),
+    ("military", "military_data_agent", "naval_power.frigates", "count", 0.5),
+    ("military", "military_data_agent", "naval_power.destroyers", "count", 0.5),
+    ("military", "military_data_agent", "naval_power.submarines", "count", 0.5),
+    ("military", "military_data_agent", "naval_power.aircraft_carriers", "count", 0.5),
+    ("military", "military_data_agent", "logistics.supply_trucks", "count", 0.25),
+    ("military", "military_data_agent", "logistics.fuel_reserves", "level", 0.25),
+    ("military", "military_data_agent", "logistics.transport_aircraft", "count", 0.25),
+    ("military", "military_data_agent", "available_equipment.small_arms", "count", 0.25),
+    ("military", "military_data_agent", "available_equipment.support_gear", "level", 0.25),
+    ("economic", "economic_data_agent", "gdp", "money", 2.0),
+    ("economic", "economic_data_agent", "defense_spending", "money", 1.5),
+    ("economic", "economic_data_agent", "trade_balance", "money", 0.5),
+    ("economic", "economic_data_agent", "economic_growth", "percent", 1.0),
+    ("economic", "economic_data_agent", "wartime_resilience", "level", 1.0),
+    ("sentiment", "sentiment_data_agent", "recent_news_sentiment", "level", 1.0),
+    ("sentiment", "sentiment_data_agent", "reports_of_protests", "inverse_intensity", 1.0),
+    ("sentiment", "sentiment_data_agent", "public_morale", "level", 1.5),
+    ("sentiment", "sentiment_data_agent", "political_stability", "level", 1.5),
+]
+FEATURE_NAMES = [f"{dimension}.{path}" for dimension, _, path, _, _ in FEATURES]
+FEATURE_WEIGHTS = np.array([weight for *_, weight in FEATURES])
+# Qualitative levels stay within 0..1 when noise is added
+LEVEL_FEATURES = np.array(
+    [kind in ("level", "inverse_intensity") for *_, kind, _ in FEATURES]
+)
+# One-hot (features x dimensions) used to average features per dimension
+FEATURE_DIMENSIONS = np.array(
+    [[float(f[0] == d) for d in DIMENSIONS] for f in FEATURES]
+)
+
+POSITIVE_WORDS = (
+    "very high", "high", "strong", "robust", "stable", "positive", "extensive",
+    "large", "abundant", "resilient", "united", "rising", "growing", "good",
+)
+NEGATIVE_WORDS = (
+    "very low", "low", "weak", "fragile", "unstable", "instability", "negative",
+    "limited", "scarce", "poor", "declining", "crisis", "widespread", "unrest",
+    "tension", "divided", "shortage",
+)
+NEUTRAL_WORDS = ("medium", "moderate", "mixed", "average", "neutral")
+_LEVEL_SCORES = {
+    **{word: 1.0 for word in POSITIVE_WORDS},
+    **{word: 0.0 for word in NEGATIVE_WORDS},
+    **{word: 0.5 for word in NEUTRAL_WORDS},
+}
+# How much of something (e.g. protests) a text describes, not how good it sounds
+INTENSITY_WORDS = {
+    1.0: (
+        "very high", "high", "widespread", "mass", "massive", "frequent",
+        "nationwide", "large-scale", "large", "major", "violent", "escalating",
+        "ongoing", "significant", "intense", "many", "numerous", "daily", "heavy",
+    ),
+    0.5: ("moderate", "medium", "some", "occasional", "periodic", "mixed"),
+    0.0: (
+        "no", "none", "very low", "low", "limited", "few", "small", "minor",
+        "rare", "rarely", "sporadic", "isolated", "minimal", "negligible",
+    ),
+}
+_INTENSITY_SCORES = {
+    word: score for score, words in INTENSITY_WORDS.items() for word in words
+}
+# "not (very) stable", "no major protests", "without unrest": the keyword
+# after a negation counts inverted
+_NEGATION = (
+    r"(?:\b(not|no|never|without|\w+n't)\s+"
+    r"(?:(?:very|particularly|especially|really|so|too|that)\s+)?)?"
+)
+
+
+def _keywords(scores: dict) -> re.Pattern:
+    # Longest phrases first, so "very low" is not read as "low"
+    words = sorted(scores, key=len, reverse=True)
+    return re.compile(_NEGATION + r"\b(%s)\b" % "|".join(re.escape(w) for w in words))
+
+
+_LEVEL = _keywords(_LEVEL_SCORES)
+_INTENSITY = _keywords(_INTENSITY_SCORES)
+SCALES = {
+    "thousand": 1e3, "k": 1e3,
+    "million": 1e6, "m": 1e6, "mn": 1e6,
+    "billion": 1e9, "b": 1e9, "bn": 1e9,
+    "trillion": 1e12, "t": 1e12, "tn": 1e12,
+}
+_AMOUNT = re.compile(
+    r"(-)?\s*(US\$|\$|USD\s*)?\s*(\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)\s*"
+    r"(trillion|billion|million|thousand|tn|bn|mn|[tbmk])?\b(\s*%)?",
+    re.IGNORECASE,
+)
+_YEAR = re.compile(r"(?:19|20)\d\d")
+# A deficit right around the amount makes it negative: "deficit of $12
+# billion", "$95B trade deficit", but not "$20 billion surplus after a deficit"
+_DEFICIT_BEFORE = re.compile(r"\bdeficits?(?:\s+[a-z]+){0,2}[\s:]*$", re.IGNORECASE)
+_DEFICIT_AFTER = re.compile(
+    r"\s*(?:(?:budget|fiscal|trade|government|current[- ]account)\s+)?deficits?\b",
+    re.IGNORECASE,
+)
+_PERCENT = re.compile(r"(-?\d+(?:\.\d+)?)\s*%")
+
+
+def parse_amount(value, money: bool = False) -> float:
+    """
+    Parse "$3.7 trillion", "-$95B" or "deficit of 12 billion" into a number.
+    Percentages and bare years ("In 2023, ...") are skipped; for money the
+    first amount with a currency sign or scale word is preferred.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return np.nan
+    candidates = [
+        m
+        for m in _AMOUNT.finditer(value)
+        if not m.group(5)
+        and not (_YEAR.fullmatch(m.group(3)) and not m.group(2) and not m.group(4))
+    ]
+    if money:
+        candidates = [m for m in candidates if m.group(2) or m.group(4)] or candidates
+    if not candidates:
+        return np.nan
+    match = candidates[0]
+    amount = float(match.group(3).replace(",", ""))
+    amount *= SCALES.get((match.group(4) or "").lower(), 1.0)
+    if (
+        match.group(1)
+        or _DEFICIT_BEFORE.search(value, 0, match.start())
+        or _DEFICIT_AFTER.match(value, match.end())
+    ):
+        amount = -abs(amount)
+    return amount
+
+
+def parse_percent(value) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, str):
+        return np.nan
+    match = _PERCENT.search(value)
+    return float(match.group(1)) if match else np.nan
+
+
+def _keyword_score(value, pattern: re.Pattern, scores: dict) -> float:
+    """Mean score of the keywords in value (negated ones inverted), or NaN."""
+    if not isinstance(value, str):
+        return np.nan
+    text = value.lower()
+    if not text or text == "unknown":
+        return np.nan
+    found = [
+        1.0 - scores[word] if negation else scores[word]
+        for negation, word in pattern.findall(text)
+    ]
+    return float(np.mean(found)) if found else np.nan
+
+
+def parse_level(value) -> float:
+    """
+    Map a qualitative description to 0..1 from its positive, neutral and
+    negative keywords ("not stable" counts as negative). Returns NaN when
+    nothing is recognised.
+    """
+    return _keyword_score(value, _LEVEL, _LEVEL_SCORES)
+
+
+def parse_intensity(value) -> float:
+    """
+    Map a description of how much of something there is (e.g. protests)
+    to 0..1: "widespread" or "mass" is high, "limited", "none" or "not
+    widespread" is low. Returns NaN when nothing is recognised.
+    """
+    return _keyword_score(value, _INTENSITY, _INTENSITY_SCORES)
+
+
+def _lookup(profile: dict, path: str):
+    value = profile
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def extract_features(profiles: dict) -> np.ndarray:
+    """
+    Turn one country's structured agent outputs into a feature vector.
+    profiles maps tool name -> single-country profile (e.g. MilitaryProfile
+    as a dict). Unknown values are NaN.
+    """
+    features = np.full(len(FEATURES), np.nan)
+    for i, (_, tool_name, path, kind, _) in enumerate(FEATURES):
+        value = _lookup(profiles.get(tool_name) or {}, path)
+        if value is None:
+            continue
+        if kind in ("count", "money"):
+            features[i] = parse_amount(value, money=kind == "money")
+        elif kind == "percent":
+            features[i] = parse_percent(value)
+        elif kind == "level":
+            features[i] = parse_level(value)
+        elif kind == "inverse_intensity":
+            # More protest means a weaker position
+            features[i] = 1.0 - parse_intensity(value)
+    return features
+
+
+def split_pair_data(data: dict) -> tuple[dict, dict]:
+    """Split pipeline data ({tool name: {"country1", "country2"}}) per country."""
+    first, second = {}, {}
+    for tool_name, output in data.items():
+        if isinstance(output, dict) and "error" not in output:
+            first[tool_name] = output.get("country1") or {}
+            second[tool_name] = output.get("country2") or {}
+    return first, second
+
+
+def normalize_weights(weights: dict | None = None) -> np.ndarray:
+    """Return [military, economic, sentiment, geography] weights summing to 1."""
+    weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+    vector = np.array([weights[d] for d in (*DIMENSIONS, "geography")], dtype=float)
+    return vector / vector.sum()
+
+
+def dimension_scores(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Vectorized per-dimension shares for country a against country b.
+    a and b are (pairs, features); returns (pairs, dimensions) in 0..1,
+    0.5 where a dimension has no data for either side.
+    """
+    a = np.atleast_2d(a)
+    b = np.atleast_2d(b)
+    available = ~(np.isnan(a) | np.isnan(b))
+    total = np.abs(a) + np.abs(b)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        share = np.where(total > 0, 0.5 + 0.5 * (a - b) / total, 0.5)
+    share = np.where(available, share, 0.0)
+    weights = available * FEATURE_WEIGHTS
+    numerator = (share * weights) @ FEATURE_DIMENSIONS
+    denominator = weights @ FEATURE_DIMENSIONS
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(denominator > 0, numerator / denominator, 0.5)
+
+
+def score_pairs(
+    a: np.ndarray,
+    b: np.ndarray,
+    weights: dict | None = None,
+    geography: np.ndarray | float = 0.5,
+) -> np.ndarray:
+    """
+    Probability that country a prevails over country b for every row.
+    geography is the 0..1 qualitative Geography/Allies share for a.
+    """
+    w = normalize_weights(weights)
+    return dimension_scores(a, b) @ w[:3] + w[3] * np.asarray(geography, dtype=float)
+
+
+def _perturb(features: np.ndarray, log_noise: np.ndarray) -> np.ndarray:
+    perturbed = features * np.exp(log_noise)
+    return np.where(LEVEL_FEATURES, np.clip(perturbed, 0.0, 1.0), perturbed)
+
+
+def _sample_scores(a: np.ndarray, b: np.ndarray, w: np.ndarray, geography) -> np.ndarray:
+    """Like score_pairs, but with one row of weights per row of features."""
+    return (dimension_scores(a, b) * w[:, :3]).sum(axis=1) + w[:, 3] * geography
+
+
+def sensitivity(
+    a: np.ndarray,
+    b: np.ndarray,
+    weights: dict | None = None,
+    geography: float = 0.5,
+    samples: int = SENSITIVITY_SAMPLES,
+    noise: float = SENSITIVITY_NOISE,
+    concentration: float = SENSITIVITY_CONCENTRATION,
+    interval: float = SENSITIVITY_INTERVAL,
+    seed: int | None = 0,
+) -> dict:
+    """
+    Monte Carlo spread of country a's probability over b in one vectorized
+    batch: weights are drawn from a Dirichlet around the model weights and
+    every metric gets independent log-normal noise. The tornado moves one
+    input at a time to the low/high end of the interval (a weight, others
+    rescaled; or a's metric relative to b's) and records the swing.
+    All probabilities are 0..1.
+    """
+    rng = np.random.default_rng(seed)
+    a = np.asarray(a, dtype=float).reshape(-1)
+    b = np.asarray(b, dtype=float).reshape(-1)
+    w = normalize_weights(weights)
+    tail = (1 - interval) / 2
+
+    sampled_weights = rng.dirichlet(w * concentration, samples)
+    probabilities = _sample_scores(
+        _perturb(a, rng.normal(0.0, noise, (samples, a.size))),
+        _perturb(b, rng.normal(0.0, noise, (samples, b.size))),
+        sampled_weights,
+        geography,
+    )
+    low, high = np.quantile(probabilities, [tail, 1 - tail])
+
+    # Tornado rows: (name, weights, log noise on a) for the low and high end
+    bounds = np.quantile(sampled_weights, [tail, 1 - tail], axis=0)
+    z = NormalDist().inv_cdf(1 - tail) * noise
+    known = np.flatnonzero(~(np.isnan(a) | np.isnan(b)))
+    names = [f"weight.{n}" for n in WEIGHT_NAMES] + [FEATURE_NAMES[i] for i in known]
+    rows = 2 * len(names)
+    tornado_weights = np.tile(w, (rows, 1))
+    log_noise = np.zeros((rows, a.size))
+    for j in range(len(WEIGHT_NAMES)):
+        for side in (0, 1):
+            value = bounds[side, j]
+            row = tornado_weights[2 * j + side]
+            row *= (1 - value) / (1 - w[j])
+            row[j] = value
+    for k, i in enumerate(known):
+        offset = 2 * (len(WEIGHT_NAMES) + k)
+        log_noise[offset, i], log_noise[offset + 1, i] = -z, z
+    swings = _sample_scores(
+        _perturb(a, log_noise), np.tile(b, (rows, 1)), tornado_weights, geography
+    ).reshape(-1, 2)
+    tornado = sorted(
+        (
+            {
+                "input": name,
+                "low": float(lo),
+                "high": float(hi),
+                "swing": float(abs(hi - lo)),
+            }
+            for name, (lo, hi) in zip(names, swings)
+        ),
+        key=lambda bar: bar["swing"],
+        reverse=True,
+    )
+    return {
+        "samples": samples,
+        "mean": float(probabilities.mean()),
+        "std": float(probabilities.std()),
+        "interval": interval,
+        "low": float(low),
+        "high": float(high),
+        # Ties (e.g. no data at all) favour neither side
+        "ahead": float((probabilities > 0.5 + 1e-9).mean()),
+        "behind": float((probabilities < 0.5 - 1e-9).mean()),
+        "tornado": tornado,
+    }
+
+
+def score_pair(
+    country1: str,
+    country2: str,
+    data: dict,
+    weights: dict | None = None,
+    geography: float = 0.5,
+) -> dict:
+    """Score one pipeline data dict and return percentages per country."""
+    first, second = split_pair_data(data)
+    a, b = extract_features(first), extract_features(second)
+    dimensions = dimension_scores(a, b)[0]
+    probability = float(score_pairs(a, b, weights, geography)[0])
+    return {
+        country1: round(100 * probability, 1),
+        country2: round(100 * (1 - probability), 1),
+        "dimensions": {
+            d: round(100 * float(s), 1) for d, s in zip(DIMENSIONS, dimensions)
+        },
+        "weights": dict(
+            zip((*DIMENSIONS, "geography"), normalize_weights(weights).round(3).tolist())
+        ),
+    }
+
+
+def sensitivity_pair(
+    country1: str,
+    country2: str,
+    data: dict,
+    weights: dict | None = None,
+    geography: float = 0.5,
+    **kwargs,
+) -> dict:
+    """
+    Monte Carlo sensitivity of one pipeline data dict, in percentages:
+    each country's mean and interval, how often each one comes out ahead
+    and the inputs that move country1's probability most.
+    """
+    first, second = split_pair_data(data)
+    result = sensitivity(
+        extract_features(first), extract_features(second), weights, geography, **kwargs
+    )
+    pct = lambda p: round(100 * p, 1)
+    return {
+        "samples": result["samples"],
+        "interval": round(100 * result["interval"]),
+        country1: {
+            "mean": pct(result["mean"]),
+            "low": pct(result["low"]),
+            "high": pct(result["high"]),
+            "ahead": pct(result["ahead"]),
+        },
+        country2: {
+            "mean": pct(1 - result["mean"]),
+            "low": pct(1 - result["high"]),
+            "high": pct(1 - result["low"]),
+            "ahead": pct(result["behind"]),
+        },
+        "tornado": [
+            {
+                "input": bar["input"],
+                "low": pct(bar["low"]),
+                "high": pct(bar["high"]),
+                "swing": pct(bar["swing"]),
+            }
+            for bar in result["tornado"][:SENSITIVITY_TORNADO]
+        ],
+    }
+
+
+def format_prediction(country1: str, country2: str, scores: dict) -> str:
+    """Format scores the way the Prediction Agent reports them."""
+    first = round(scores[country1])
+    return f"{country1}: {first}%\n{country2}: {100 - first}%"
@@ -0,0 +1,159 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# ⏳ How long a cached search stays fresh, per category (seconds).
+# Sentiment goes stale within hours, military inventories within weeks.
+DEFAULT_TTLS = {
+    "sentiment": 6 * 3600,
+    "economic": 7 * 24 * 3600,
+    "military": 30 * 24 * 3600,
+    "general": 24 * 3600,
+}
+
+# Checked in order: a "military news" query is still military data
+CATEGORY_KEYWORDS = {
+    "economic": ("gdp", "economic", "economy", "trade balance", "defense spending"),
+    "military": ("military", "army", "firepower", "personnel", "naval", "airpower"),
+    "sentiment": (
+        "sentiment", "protest", "morale", "unrest", "political stability",
+        "public opinion",
+    ),
+}
+
+
+def normalize_query(query: str) -> str:
+    """Lower-case the query and collapse whitespace and trailing punctuation."""
+    query = re.sub(r"\s+", " ", query.strip().lower())
+    return query.rstrip(" .?!")
+
+
+def categorize_query(query: str) -> str:
+    """Guess which data category a search query belongs to."""
+    query = normalize_query(query)
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        if any(keyword in query for keyword in keywords):
+            return category
+    return "general"
+
+
+class SearchCache:
+    """
+    Disk-backed cache of Tavily responses keyed on the normalized query.
+    Entries expire after a per-category TTL and the least recently used
+    ones are evicted once max_entries or max_bytes is exceeded.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = "search_cache.db",
+        max_entries: int = 1000,
+        max_bytes: int = 50 * 1024 * 1024,
+        ttls: dict | None = None,
+    ):
+        self.path = str(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS search_cache (
+                query TEXT PRIMARY KEY,
+                category TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_search_cache_access "
+            "ON search_cache (last_access)"
+        )
+
+    def get(self, query: str) -> dict | None:
+        """Return the cached response for query, or None if missing or stale."""
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT category, response, created_at FROM search_cache WHERE query = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            category, response, created_at = row
+            if now - created_at > self.ttls.get(category, self.ttls["general"]):
+                self._conn.execute("DELETE FROM search_cache WHERE query = ?", (key,))
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE search_cache SET last_access = ? WHERE query = ?", (now, key)
+            )
+            self.hits += 1
+        return json.loads(response)
+
+    def set(self, query: str, response: dict) -> None:
+        """Store a search response and evict least recently used entries."""
+        key = normalize_query(query)
+        payload = json.dumps(response, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (key, categorize_query(key), payload, len(payload), now, now),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        entries, total_bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM search_cache"
+        ).fetchone()
+        if entries <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT query, size FROM search_cache ORDER BY last_access ASC"
+        ).fetchall()
+        evicted = []
+        for query, size in rows:
+            if entries <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            evicted.append((query,))
+            entries -= 1
+            total_bytes -= size
+        self._conn.executemany("DELETE FROM search_cache WHERE query = ?", evicted)
+        self.evictions += len(evicted)
+
+    def clear(self) -> None:
+        """Remove every cached entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM search_cache")
+
+    def stats(self) -> dict:
+        """Return hit/miss counters for this process plus current cache size."""
+        with self._lock:
+            entries, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM search_cache"
+            ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": total_bytes,
+        }
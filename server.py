@@ -0,0 +1,292 @@
+import os
+import json
+import time
+import re
+import uuid
+import asyncio
+import argparse
+from urllib.parse import urlsplit, parse_qs
+from main import run_turn, set_progress_listener
+from pipeline import run_pipeline
+from reports import ReportWriter
+from sessions import RunSession
+from clients import close_clients
+
+# 🌐 Server limits (override with environment variables)
+SERVER_MAX_RUNS = int(os.getenv("SERVER_MAX_RUNS", "4"))
+SERVER_MAX_QUEUE = int(os.getenv("SERVER_MAX_QUEUE", "32"))
+SERVER_MAX_BODY = 64 * 1024
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class PredictionJob:
+    """
+    One prediction shared by every client that asked for the same pair
+    while it was in flight. Events are kept so late subscribers get the
+    progress so far before the live updates.
+    """
+
+    def __init__(self, key: tuple):
+        self.key = key
+        self.events: list[tuple[str, dict]] = []
+        self.subscribers: set[asyncio.Queue] = set()
+        self.done = False
+        self.progress = 0.0
+
+    def publish(self, event: str, data: dict) -> None:
+        self.events.append((event, data))
+        for queue in self.subscribers:
+            queue.put_nowait((event, data))
+        if event in ("result", "error"):
+            self.done = True
+
+    def on_progress(self, progress: float, description: str) -> None:
+        self.progress = max(self.progress, progress)
+        self.publish("progress", {"percentage": self.progress, "status": description})
+
+    async def stream(self):
+        """Yield (event, data) from the start until the job finishes."""
+        queue: asyncio.Queue = asyncio.Queue()
+        backlog = list(self.events)
+        self.subscribers.add(queue)
+        try:
+            for event, data in backlog:
+                yield event, data
+            if self.done:
+                return
+            while True:
+                event, data = await queue.get()
+                yield event, data
+                if event in ("result", "error"):
+                    return
+        finally:
+            self.subscribers.discard(queue)
+
+
+class PredictionServer:
+    """
+    Runs predictions for HTTP clients: at most max_runs at once, up to
+    max_queue more waiting (further requests get 503), and identical
+    in-flight requests share one run.
+    """
+
+    def __init__(self, max_runs: int = SERVER_MAX_RUNS, max_queue: int = SERVER_MAX_QUEUE):
+        self.max_runs = max_runs
+        self.max_queue = max_queue
+        self.jobs: dict[tuple, PredictionJob] = {}
+        self._slots: asyncio.Semaphore | None = None
+
+    def submit(self, country1: str, country2: str, mode: str, narrative: bool):
+        """Return the in-flight job for this request, or start one (None if full)."""
+        key = (country1.strip().lower(), country2.strip().lower(), mode, narrative)
+        job = self.jobs.get(key)
+        if job is not None:
+            return job
+        if len(self.jobs) >= self.max_runs + self.max_queue:
+            return None
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_runs)
+        job = PredictionJob(key)
+        self.jobs[key] = job
+        asyncio.get_running_loop().create_task(
+            self._run(job, country1.strip(), country2.strip(), mode, narrative)
+        )
+        return job
+
+    async def _run(self, job, country1, country2, mode, narrative) -> None:
+        started = time.perf_counter()
+        try:
+            if self._slots.locked():
+                job.publish("queued", {"position": len(self.jobs) - self.max_runs})
+            async with self._slots:
+                set_progress_listener(job.on_progress)
+                filename = "prediction_{}_{}_{}".format(
+                    _slug(country1), _slug(country2), uuid.uuid4().hex[:8]
+                )
+                with ReportWriter(f"{country1} vs {country2}", filename) as report:
+                    if mode == "agents":
+                        result = await self._run_agents(country1, country2, report)
+                    else:
+                        result = await run_pipeline(
+                            country1,
+                            country2,
+                            _print=False,
+                            narrative=narrative,
+                            report=report,
+                        )
+                    json_file, txt_file = report.close()
+            result["report_files"] = {"json": str(json_file), "text": str(txt_file)}
+            result["elapsed"] = round(time.perf_counter() - started, 3)
+            job.publish("result", result)
+        except Exception as e:
+            job.publish("error", {"error": str(e)})
+        finally:
+            self.jobs.pop(job.key, None)
+
+    async def _run_agents(self, country1, country2, report) -> dict:
+        """Run the full agent graph (main.py) instead of the pipeline."""
+        session = RunSession()
+        final_result, budget, metrics, sources = await run_turn(
+            f"{country1} and {country2}", session, _print=False, report=report
+        )
+        if final_result is None:
+            raise RuntimeError("Prediction Agent did not answer")
+        result = {
+            "prediction": final_result,
+            "citations": sources.citations(),
+            "budget": budget.report(),
+            "metrics": metrics.report(),
+        }
+        report.write_section("analysis_result", final_result)
+        for key in ("citations", "budget", "metrics"):
+            report.write_section(key, result[key])
+        await report.write_conversation_history(session)
+        return result
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            await self._handle(reader, writer)
+        except ValueError:
+            await _send_json(writer, 400, {"error": "malformed request"})
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        except Exception as e:
+            # Never end a request with a bare disconnect
+            try:
+                await _send_json(writer, 500, {"error": f"internal error: {e}"})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    async def _handle(self, reader, writer) -> None:
+        head = await reader.readuntil(b"\r\n\r\n")
+        request_line, *header_lines = head.decode("latin-1").split("\r\n")
+        method, target, _ = request_line.split(" ", 2)
+        headers = {}
+        for line in header_lines:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        url = urlsplit(target)
+
+        if url.path == "/health":
+            await _send_json(
+                writer, 200, {"status": "ok", "in_flight": len(self.jobs)}
+            )
+            return
+        if url.path != "/predict":
+            await _send_json(writer, 404, {"error": "not found"})
+            return
+        if method not in ("GET", "POST"):
+            await _send_json(writer, 405, {"error": "use GET or POST"})
+            return
+
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        length = int(headers.get("content-length", "0"))
+        if length > SERVER_MAX_BODY:
+            await _send_json(writer, 413, {"error": "request body too large"})
+            return
+        if length:
+            try:
+                body = json.loads(await reader.readexactly(length))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                body = None
+            if not isinstance(body, dict):
+                await _send_json(writer, 400, {"error": "body must be a JSON object"})
+                return
+            params.update(body)
+
+        country1, country2 = params.get("country1"), params.get("country2")
+        mode = params.get("mode", "pipeline")
+        if (
+            not isinstance(country1, str)
+            or not isinstance(country2, str)
+            or not country1.strip()
+            or not country2.strip()
+            or mode not in ("pipeline", "agents")
+        ):
+            await _send_json(
+                writer,
+                400,
+                {"error": "country1 and country2 are required; mode is pipeline or agents"},
+            )
+            return
+        narrative = str(params.get("narrative", "true")).lower() not in ("0", "false", "no")
+
+        job = self.submit(country1, country2, mode, narrative)
+        if job is None:
+            await _send_json(
+                writer, 503, {"error": "server busy, retry later"}, {"Retry-After": "5"}
+            )
+            return
+
+        if str(params.get("stream", "true")).lower() in ("0", "false", "no"):
+            async for event, data in job.stream():
+                if event in ("result", "error"):
+                    await _send_json(writer, 200 if event == "result" else 500, data)
+            return
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: close\r\n\r\n"
+        )
+        async for event, data in job.stream():
+            payload = json.dumps(data, ensure_ascii=False, default=str)
+            writer.write(f"event: {event}\ndata: {payload}\n\n".encode("utf-8"))
+            # Backpressure: a slow client only slows its own stream
+            await writer.drain()
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+async def _send_json(writer, status: int, body: dict, headers: dict | None = None):
+    payload = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+    lines = [
+        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+        "Content-Type: application/json",
+        f"Content-Length: {len(payload)}",
+        "Connection: close",
+        *(f"{k}: {v}" for k, v in (headers or {}).items()),
+    ]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + payload)
+    await writer.drain()
+
+
+async def serve(host: str = "127.0.0.1", port: int = 8000, server=None):
+    server = server or PredictionServer()
+    http = await asyncio.start_server(server.handle, host, port)
+    print(f"🌐 Serving predictions on http://{host}:{port}/predict")
+    try:
+        async with http:
+            await http.serve_forever()
+    finally:
+        await close_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP API with SSE progress for predictions.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-runs", type=int, default=SERVER_MAX_RUNS)
+    parser.add_argument("--max-queue", type=int, default=SERVER_MAX_QUEUE)
+    args = parser.parse_args()
+    try:
+        asyncio.run(
+            serve(args.host, args.port, PredictionServer(args.max_runs, args.max_queue))
+        )
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,204 @@
+import os
+import json
+import uuid
+import asyncio
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from agents import SQLiteSession
+
+# 💬 Conversation store shared by every run (each run gets its own session id)
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "conversations.db")
+SESSION_MAX_ITEMS = int(os.getenv("SESSION_MAX_ITEMS", "60"))
+SESSION_RETENTION_DAYS = float(os.getenv("SESSION_RETENTION_DAYS", "30"))
+SQLITE_BUSY_TIMEOUT_MS = 10000
+
+# One group-commit writer per (event loop, database file)
+_writers: dict = {}
+
+
+def new_session_id() -> str:
+    return f"run-{datetime.now().strftime('%Y%m%d_%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    return conn
+
+
+class _BatchWriter:
+    """
+    Collects add_items calls from every session on one database file and
+    commits whatever is pending in a single transaction, so concurrent
+    runs share one write lock acquisition instead of queueing for it.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.pending: list = []
+        self.flushing = False
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    async def add(self, session: "RunSession", items: list) -> None:
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((session, items, future))
+        if not self.flushing:
+            self.flushing = True
+            asyncio.get_running_loop().create_task(self._flush())
+        await future
+
+    async def _flush(self) -> None:
+        try:
+            while self.pending:
+                batch, self.pending = self.pending, []
+                try:
+                    await asyncio.to_thread(self._write, batch)
+                except Exception as e:
+                    for _, _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_result(None)
+        finally:
+            self.flushing = False
+
+    def _write(self, batch: list) -> None:
+        with self._lock:
+            if self._conn is None:
+                self._conn = _connect(self.db_path)
+            conn = self._conn
+            with conn:
+                for session, items, _ in batch:
+                    conn.execute(
+                        f"INSERT OR IGNORE INTO {session.sessions_table} (session_id) VALUES (?)",
+                        (session.session_id,),
+                    )
+                    conn.executemany(
+                        f"INSERT INTO {session.messages_table} (session_id, message_data) VALUES (?, ?)",
+                        [(session.session_id, json.dumps(item)) for item in items],
+                    )
+                    conn.execute(
+                        f"UPDATE {session.sessions_table} SET updated_at = CURRENT_TIMESTAMP "
+                        "WHERE session_id = ?",
+                        (session.session_id,),
+                    )
+                for session in {id(s): s for s, _, _ in batch}.values():
+                    session._trim(conn)
+
+
+def _get_writer(db_path: str) -> _BatchWriter:
+    loop = asyncio.get_running_loop()
+    key = (loop, db_path)
+    if key not in _writers:
+        for stale in [k for k in _writers if k[0] is not loop]:
+            del _writers[stale]
+        _writers[key] = _BatchWriter(db_path)
+    return _writers[key]
+
+
+class RunSession(SQLiteSession):
+    """
+    SQLiteSession with a fresh id per run, WAL-mode connections, grouped
+    writes and a retention limit: once a session holds more than
+    max_items items the oldest turns are dropped, always cutting at a
+    user message so tool calls stay paired with their outputs.
+    """
+
+    def __init__(
+        self,
+        session_id: str | None = None,
+        db_path: str | Path = SESSION_DB_PATH,
+        max_items: int = SESSION_MAX_ITEMS,
+    ):
+        super().__init__(session_id or new_session_id(), db_path)
+        self.max_items = max_items
+
+    def _get_connection(self) -> sqlite3.Connection:
+        if self._is_memory_db:
+            return self._shared_connection
+        if not hasattr(self._local, "connection"):
+            self._local.connection = _connect(str(self.db_path))
+        return self._local.connection
+
+    async def add_items(self, items: list) -> None:
+        if not items:
+            return
+        if self._is_memory_db:
+            await super().add_items(items)
+
+            def trim():
+                with self._lock:
+                    self._trim(self._shared_connection)
+
+            await asyncio.to_thread(trim)
+            return
+        await _get_writer(str(self.db_path)).add(self, items)
+
+    def _trim(self, conn: sqlite3.Connection) -> None:
+        """Drop the oldest items beyond max_items (caller commits)."""
+        if not self.max_items:
+            return
+        rows = conn.execute(
+            f"""
+            SELECT id, message_data FROM {self.messages_table}
+            WHERE session_id = ?
+            ORDER BY id DESC
+            LIMIT ?
+            """,
+            (self.session_id, self.max_items + 1),
+        ).fetchall()
+        if len(rows) <= self.max_items:
+            return
+        kept = list(reversed(rows[: self.max_items]))
+        cutoff = next(
+            (row_id for row_id, data in kept if json.loads(data).get("role") == "user"),
+            None,
+        )
+        if cutoff is None:
+            return
+        conn.execute(
+            f"DELETE FROM {self.messages_table} WHERE session_id = ? AND id < ?",
+            (self.session_id, cutoff),
+        )
+        if self._is_memory_db:
+            conn.commit()
+
+
+def purge_sessions(
+    db_path: str | Path = SESSION_DB_PATH,
+    retention_days: float = SESSION_RETENTION_DAYS,
+    sessions_table: str = "agent_sessions",
+    messages_table: str = "agent_messages",
+) -> int:
+    """Delete sessions not updated in retention_days; returns how many."""
+    if not retention_days or not Path(db_path).exists():
+        return 0
+    conn = _connect(str(db_path))
+    with conn:
+        try:
+            stale = [
+                row[0]
+                for row in conn.execute(
+                    f"SELECT session_id FROM {sessions_table} "
+                    "WHERE updated_at < datetime('now', ?)",
+                    (f"-{retention_days} days",),
+                )
+            ]
+        except sqlite3.OperationalError:
+            conn.close()
+            return 0  # tables not created yet
+        conn.executemany(
+            f"DELETE FROM {messages_table} WHERE session_id = ?", [(s,) for s in stale]
+        )
+        conn.executemany(
+            f"DELETE FROM {sessions_table} WHERE session_id = ?", [(s,) for s in stale]
+        )
+    conn.close()
+    return len(stale)
@@ -0,0 +1,32 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls with the same key: the first caller starts
+    the call, everyone arriving while it is in flight awaits the same
+    result (or exception). The call runs as its own task, so cancelling
+    one caller does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._calls: dict = {}
+        self.coalesced = 0
+
+    def in_flight(self, key) -> bool:
+        return key in self._calls and self._loop is asyncio.get_running_loop()
+
+    async def do(self, key, fn, *args, **kwargs):
+        """Return await fn(*args, **kwargs), shared with identical calls in flight."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._calls = loop, {}
+        task = self._calls.get(key)
+        if task is None:
+            task = loop.create_task(fn(*args, **kwargs))
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
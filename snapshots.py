@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import argparse
+import threading
+from pathlib import Path
+from pipeline import DATA_AGENTS, gather_country_data, pair_data, run_pipeline
+from reports import ReportWriter
+from search_cache import DEFAULT_TTLS
+from sources import get_sources
+from tools_agents import with_sources
+from clients import close_clients
+
+# 📸 Per-country, per-dimension snapshots of the data agents' outputs
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "snapshots.db")
+
+# A dimension goes stale on the same schedule as its searches
+DIMENSION_TTLS = {
+    "military_data_agent": DEFAULT_TTLS["military"],
+    "economic_data_agent": DEFAULT_TTLS["economic"],
+    "sentiment_data_agent": DEFAULT_TTLS["sentiment"],
+}
+
+
+def country_key(country: str) -> str:
+    return " ".join(country.lower().split())
+
+
+class SnapshotStore:
+    """
+    Latest single-country output of each data agent, with the time it
+    was fetched and the sources it cited. Profiles are rebuilt from
+    the fresh snapshots and only stale dimensions are fetched again.
+    """
+
+    def __init__(self, path: str | Path = SNAPSHOT_PATH, ttls: dict | None = None):
+        self.path = str(path)
+        self.ttls = {**DIMENSION_TTLS, **(ttls or {})}
+        self.fetched = 0
+        self.reused = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS snapshots (
+                country TEXT NOT NULL,
+                dimension TEXT NOT NULL,
+                output TEXT NOT NULL,
+                sources TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (country, dimension)
+            )
+            """
+        )
+
+    def get(self, country: str, dimension: str, max_age: float | None = None):
+        """Return (output, sources, fetched_at) if fresh enough, else None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT output, sources, fetched_at FROM snapshots "
+                "WHERE country = ? AND dimension = ?",
+                (country_key(country), dimension),
+            ).fetchone()
+        if row is None:
+            return None
+        max_age = self.ttls[dimension] if max_age is None else max_age
+        if time.time() - row[2] > max_age:
+            return None
+        return json.loads(row[0]), json.loads(row[1]), row[2]
+
+    def put(self, country: str, dimension: str, output: dict, sources: list) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?)",
+                (
+                    country_key(country),
+                    dimension,
+                    json.dumps(output, ensure_ascii=False),
+                    json.dumps(sources, ensure_ascii=False),
+                    time.time(),
+                ),
+            )
+
+    def stale_dimensions(self, country: str) -> list[str]:
+        return [d for d in DATA_AGENTS if self.get(country, d) is None]
+
+    async def _fetch(self, country, dimension, _print, report) -> dict:
+        data, sources = await with_sources(
+            gather_country_data, country, None, _print, report, [dimension]
+        )
+        output = data[dimension]
+        if "error" not in output:
+            self.put(country, dimension, output, sources.citations())
+        if get_sources() is not None:
+            get_sources().extend(sources.citations())
+        return output
+
+    async def load_profile(
+        self,
+        country: str,
+        _print: bool = False,
+        report: ReportWriter | None = None,
+        force: bool = False,
+    ) -> dict:
+        """
+        Single-country profile ({tool name: output, "fetched_at": {...}})
+        from fresh snapshots, running only the agents whose snapshot is
+        missing or stale (all of them with force).
+        """
+        profile, fetched_at, stale = {}, {}, []
+        for dimension in DATA_AGENTS:
+            snapshot = None if force else self.get(country, dimension)
+            if snapshot is None:
+                stale.append(dimension)
+                continue
+            profile[dimension], sources, fetched_at[dimension] = snapshot
+            if get_sources() is not None:
+                get_sources().extend(sources)
+            self.reused += 1
+        outputs = await asyncio.gather(
+            *(self._fetch(country, d, _print, report) for d in stale)
+        )
+        for dimension, output in zip(stale, outputs):
+            profile[dimension] = output
+            fetched_at[dimension] = time.time()
+        self.fetched += len(stale)
+        profile["fetched_at"] = fetched_at
+        return profile
+
+    async def gather_pair(
+        self,
+        country1: str,
+        country2: str,
+        _print: bool = True,
+        report: ReportWriter | None = None,
+    ) -> dict:
+        """Drop-in for gather_country_data in run_pipeline(gather=...)."""
+        first, second = await asyncio.gather(
+            self.load_profile(country1, _print, report),
+            self.load_profile(country2, _print, report),
+        )
+        return pair_data({country1: first, country2: second}, country1, country2)
+
+    def stats(self) -> dict:
+        return {"fetched": self.fetched, "reused": self.reused}
+
+
+async def main(args) -> None:
+    store = SnapshotStore(args.db)
+    if args.command == "refresh":
+        # Daily job: bring every country's snapshots up to date
+        for country in args.countries:
+            stale = DATA_AGENTS if args.force else store.stale_dimensions(country)
+            await store.load_profile(country, force=args.force)
+            print(f"🔄 {country}: refreshed {', '.join(stale) or 'nothing (all fresh)'}")
+    else:
+        country1, country2 = args.countries[:2]
+        with ReportWriter(f"{country1} vs {country2}") as report:
+            result = await run_pipeline(
+                country1,
+                country2,
+                narrative=not args.no_narrative,
+                report=report,
+                gather=store.gather_pair,
+            )
+            json_file, txt_file = report.close()
+        print(f"\n\n{result['prediction']}")
+        print(f"\n📄 Text report saved: {txt_file}")
+        print(f"📊 JSON report saved: {json_file}")
+    stats = store.stats()
+    print(f"📸 Snapshots: {stats['fetched']} fetched, {stats['reused']} reused")
+    await close_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Predict or refresh from per-country, per-dimension snapshots."
+    )
+    parser.add_argument("command", choices=("predict", "refresh"))
+    parser.add_argument("countries", nargs="+")
+    parser.add_argument("--db", default=SNAPSHOT_PATH)
+    parser.add_argument("--force", action="store_true", help="refresh every dimension")
+    parser.add_argument("--no-narrative", action="store_true")
+    args = parser.parse_args()
+    if args.command == "predict" and len(args.countries) != 2:
+        parser.error("predict takes exactly two countries")
+    asyncio.run(main(args))
@@ -0,0 +1,69 @@
+from contextvars import ContextVar
+from datetime import date
+from compaction import canonical_url
+
+_current_sources: ContextVar["SourceRegistry | None"] = ContextVar(
+    "current_sources", default=None
+)
+
+
+class SourceRegistry:
+    """
+    Every source returned by tavily_search during one run, deduplicated
+    by URL and numbered in the order it was first seen. Citations are
+    formatted from here, so they can only name pages that were fetched.
+    """
+
+    def __init__(self):
+        self.sources: dict[str, dict] = {}
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def add(self, url: str, title: str | None = None, query: str | None = None) -> None:
+        if not url:
+            return
+        key = canonical_url(url)
+        source = self.sources.get(key)
+        if source is None:
+            self.sources[key] = {
+                "id": len(self.sources) + 1,
+                "title": title or url,
+                "url": url,
+                "queries": [query] if query else [],
+                "accessed": date.today().isoformat(),
+            }
+        elif query and query not in source["queries"]:
+            source["queries"].append(query)
+
+    def add_search(self, query: str, response: dict) -> None:
+        """Record the results of one search response."""
+        for result in response.get("results") or []:
+            self.add(result.get("url"), result.get("title"), query)
+
+    def extend(self, citations: list[dict]) -> None:
+        """Merge citations exported by another registry (see citations())."""
+        for source in citations:
+            for query in source.get("queries") or [None]:
+                self.add(source["url"], source.get("title"), query)
+
+    def citations(self) -> list[dict]:
+        return [dict(source) for source in self.sources.values()]
+
+    def format(self) -> str:
+        """Numbered plain-text citation list."""
+        if not self.sources:
+            return "No sources were retrieved in this run."
+        return "\n".join(
+            f"[{s['id']}] {s['title']}. {s['url']} (accessed {s['accessed']})"
+            for s in self.sources.values()
+        )
+
+
+def set_sources(sources: "SourceRegistry | None"):
+    """Make sources the active registry for the current run (task context)."""
+    return _current_sources.set(sources)
+
+
+def get_sources() -> "SourceRegistry | None":
+    return _current_sources.get()
@@ -1,48 +1,204 @@
 import os, sys, json
+import time
 import asyncio
 from agents import (
     Agent,
-    OpenAIChatCompletionsModel,
-    AsyncOpenAI,
-    set_tracing_disabled,
+    ItemHelpers,
     ModelSettings,
     function_tool,
 )
-from dotenv import load_dotenv
-from tavily import TavilyClient
+from tavily import AsyncTavilyClient
 from pydantic import BaseModel
+from clients import gemini_llm, get_tavily_client
+from llm_cache import cached_model
+from search_cache import SearchCache, normalize_query
+from singleflight import SingleFlight
+from compaction import compact_search_response
+from schemas import MilitaryData, EconomicData, SentimentData
+from budget import tool_enabled, get_budget
+from metrics import get_metrics
+from sources import SourceRegistry, get_sources, set_sources
 
 if sys.platform.startswith("win"):
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-# 🌿 Load environment variables
-load_dotenv()
-set_tracing_disabled(disabled=False)
 
-TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
-os.environ["OPENAI_API_KEY"] = os.getenv("OPENAI_API_KEY", "")
+# 🔐 Gemini model (client is created lazily by the shared registry)
+llm_model = gemini_llm
+
+# ⏱️ Search limits (shared by every agent that calls tavily_search)
+TAVILY_MAX_CONCURRENCY = int(os.getenv("TAVILY_MAX_CONCURRENCY", "4"))
+TAVILY_TIMEOUT = float(os.getenv("TAVILY_TIMEOUT", "30"))
+
+# 🗄️ Disk cache in front of Tavily (set SEARCH_CACHE_PATH="" to disable)
+SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", "search_cache.db")
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1000"))
+
+# ✂️ Search results handed to the agents (TAVILY_COMPACT=0 passes them raw)
+TAVILY_COMPACT = os.getenv("TAVILY_COMPACT", "1") != "0"
+TAVILY_MAX_RESULTS = int(os.getenv("TAVILY_MAX_RESULTS", "5"))
+TAVILY_SNIPPET_CHARS = int(os.getenv("TAVILY_SNIPPET_CHARS", "600"))
+TAVILY_MIN_SCORE = float(os.getenv("TAVILY_MIN_SCORE", "0.0"))
+
+# None means the shared, lazily created client from clients.py
+client: AsyncTavilyClient | None = None
+search_cache: SearchCache | None = (
+    SearchCache(SEARCH_CACHE_PATH, max_entries=SEARCH_CACHE_MAX_ENTRIES)
+    if SEARCH_CACHE_PATH
+    else None
+)
+_search_semaphores: dict = {}
 
-# 🔐 Setup Gemini client
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
+# 🔀 Identical searches / data-agent calls in flight share one call
+search_flight = SingleFlight()
+tool_flight = SingleFlight()
 
-external_client = AsyncOpenAI(api_key=GEMINI_API_KEY, base_url=BASE_URL)
-llm_model = OpenAIChatCompletionsModel(
-    model="gemini-2.5-flash", openai_client=external_client
-)
 
+def _get_search_semaphore() -> asyncio.Semaphore:
+    """Return the search semaphore bound to the running event loop."""
+    loop = asyncio.get_running_loop()
+    semaphore = _search_semaphores.get(loop)
+    if semaphore is None:
+        _search_semaphores.clear()
+        semaphore = asyncio.Semaphore(TAVILY_MAX_CONCURRENCY)
+        _search_semaphores[loop] = semaphore
+    return semaphore
 
-client: TavilyClient = TavilyClient(TAVILY_API_KEY)
 
 class ProgressInput(BaseModel):
     percentage: int
     status: str
 
+async def _fetch(query: str) -> dict:
+    async with _get_search_semaphore():
+        try:
+            response = await asyncio.wait_for(
+                (client or get_tavily_client()).search(query, timeout=TAVILY_TIMEOUT),
+                TAVILY_TIMEOUT,
+            )
+        except asyncio.TimeoutError:
+            raise TimeoutError(
+                f"Tavily search timed out after {TAVILY_TIMEOUT}s: {query!r}"
+            )
+    if search_cache is not None:
+        # SQLite calls run in a thread so they never block the event loop
+        await asyncio.to_thread(search_cache.set, query, response)
+    return response
+
+
+async def search(query: str) -> dict:
+    """
+    Run a Tavily search without blocking the event loop.
+    Fresh results are served from the search cache, and a search that
+    is already in flight for the same query is shared rather than
+    repeated; otherwise at most TAVILY_MAX_CONCURRENCY searches run at
+    once and each one is cancelled after TAVILY_TIMEOUT seconds.
+    """
+    started = time.perf_counter()
+    if search_cache is not None:
+        cached = await asyncio.to_thread(search_cache.get, query)
+        if cached is not None:
+            if get_metrics() is not None:
+                get_metrics().record_search(time.perf_counter() - started, True)
+            return cached
+
+    key = normalize_query(query)
+    coalesced = search_flight.in_flight(key)
+    response = await search_flight.do(key, _fetch, query)
+    if get_metrics() is not None:
+        get_metrics().record_search(time.perf_counter() - started, False, coalesced)
+    return response
+
+
+async def with_sources(fn, *args):
+    """
+    Run fn with its own source registry and return (result, sources), so
+    every caller sharing a coalesced call can cite what it searched.
+    """
+    previous, sources = get_sources(), SourceRegistry()
+    set_sources(sources)
+    try:
+        return await fn(*args), sources
+    finally:
+        set_sources(previous)
+
+
+async def coalesced_call(key, fn, *args):
+    """Run fn(*args) through tool_flight; returns (result, coalesced)."""
+    coalesced = tool_flight.in_flight(key)
+    result, sources = await tool_flight.do(key, with_sources, fn, *args)
+    if get_sources() is not None:
+        get_sources().extend(sources.citations())
+    return result, coalesced
+
+
+def tool_output_extractor(tool_name: str):
+    """
+    custom_output_extractor for .as_tool(...) that records the nested
+    run's usage in the active budget and metrics before returning its text.
+    """
+
+    async def extract(result) -> str:
+        if get_budget() is not None:
+            get_budget().record_tool_run(tool_name, result)
+        if get_metrics() is not None:
+            get_metrics().record_tool_run(tool_name, result)
+        return ItemHelpers.text_message_outputs(result.new_items)
+
+    return extract
+
+
+def agent_tool(
+    agent: Agent, tool_name: str, tool_description: str, coalesce: bool = False
+):
+    """
+    Expose agent as a tool for the orchestrator. The tool respects the
+    active run budget and reports its wall time and usage to the metrics.
+    With coalesce, concurrent calls with the same input share one run
+    (its usage is charged to the run that started it).
+    """
+    tool = agent.as_tool(
+        tool_name=tool_name,
+        tool_description=tool_description,
+        custom_output_extractor=tool_output_extractor(tool_name),
+        is_enabled=tool_enabled(tool_name),
+    )
+    invoke = tool.on_invoke_tool
+
+    async def timed_invoke(ctx, input: str):
+        started = time.perf_counter()
+        coalesced = False
+        try:
+            if coalesce:
+                key = (tool_name, " ".join(input.lower().split()))
+                output, coalesced = await coalesced_call(key, invoke, ctx, input)
+                return output
+            return await invoke(ctx, input)
+        finally:
+            if get_metrics() is not None:
+                get_metrics().record_tool_time(
+                    tool_name, time.perf_counter() - started, coalesced
+                )
+
+    tool.on_invoke_tool = timed_invoke
+    return tool
+
+
 @function_tool
-def tavily_search(query: str) -> dict:
+async def tavily_search(query: str) -> dict:
     """
     Perform a Tavily search on the internet and return results.
     """
-    response = client.search(query)
+    response = await search(query)
+    if TAVILY_COMPACT:
+        response = compact_search_response(
+            response,
+            query,
+            max_results=TAVILY_MAX_RESULTS,
+            snippet_chars=TAVILY_SNIPPET_CHARS,
+            min_score=TAVILY_MIN_SCORE,
+        )
+    if get_sources() is not None:
+        get_sources().add_search(query, response)
     return response
 
 
@@ -72,54 +228,99 @@ For each country, you must provide the following categories:
 Guidelines:  
 - Make exactly one search tool call per country (no duplicates). 
 - You can use two calls for tavily_search tool for our two countries.
+- If only one country is given, make one call and return only that country.
 - Always return results in **JSON format** with clearly labeled fields.      
+- Put the first country under "country1" and the second under "country2".
+- Use null for any count you cannot find.
 
 Example Output:
 {
-  "country": "Exampleland",
-  "active_personnel": 520000,
-  "reserve_personnel": 240000,
-  "airpower": {
-    "fighter_jets": 320,
-    "bombers": 65,
-    "helicopters": 510,
-    "drones": 220
-  },
-  "land_forces": {
-    "tanks": 4200,
-    "armored_vehicles": 8200,
-    "artillery": 1700
-  },
-  "naval_power": {
-    "frigates": 25,
-    "destroyers": 15,
-    "submarines": 12,
-    "aircraft_carriers": 2
-  },
-  "logistics": {
-    "supply_trucks": 19000,
-    "fuel_reserves": "medium",
-    "transport_aircraft": 140
+  "country1": {
+    "country": "Exampleland",
+    "active_personnel": 520000,
+    "reserve_personnel": 240000,
+    "airpower": {
+      "fighter_jets": 320,
+      "bombers": 65,
+      "helicopters": 510,
+      "drones": 220
+    },
+    "land_forces": {
+      "tanks": 4200,
+      "armored_vehicles": 8200,
+      "artillery": 1700
+    },
+    "naval_power": {
+      "frigates": 25,
+      "destroyers": 15,
+      "submarines": 12,
+      "aircraft_carriers": 2
+    },
+    "logistics": {
+      "supply_trucks": 19000,
+      "fuel_reserves": "medium",
+      "transport_aircraft": 140
+    },
+    "available_equipment": {
+      "small_arms": 800000,
+      "support_gear": "high",
+      "general_weapons": "extensive"
+    }
   },
-  "available_equipment": {
-    "small_arms": 800000,
-    "support_gear": "high",
-    "general_weapons": "extensive"
+  "country2": {
+    "country": "Otherland",
+    "active_personnel": 310000,
+    "reserve_personnel": 90000,
+    "airpower": {
+      "fighter_jets": 150,
+      "bombers": 20,
+      "helicopters": 260,
+      "drones": 95
+    },
+    "land_forces": {
+      "tanks": 2100,
+      "armored_vehicles": 3900,
+      "artillery": 980
+    },
+    "naval_power": {
+      "frigates": 11,
+      "destroyers": 6,
+      "submarines": 4,
+      "aircraft_carriers": 0
+    },
+    "logistics": {
+      "supply_trucks": 8500,
+      "fuel_reserves": "low",
+      "transport_aircraft": 60
+    },
+    "available_equipment": {
+      "small_arms": 420000,
+      "support_gear": "medium",
+      "general_weapons": "limited"
+    }
   }
 }
 """
 
-military_data_Agent = agent.clone(
+military_agent = agent.clone(
     name="Military Data Agent",
-    instructions=instructions
-).as_tool(tool_name="military_data_agent",tool_description="Military Data Gathering tool")
+    instructions=instructions,
+    output_type=MilitaryData,
+)
+military_data_Agent = agent_tool(
+    military_agent,
+    tool_name="military_data_agent",
+    tool_description="Military Data Gathering tool",
+    coalesce=True,
+)
 
-economic_data_Agent = agent.clone(
+economic_agent = agent.clone(
     name="Economic Data Agent",
     instructions="""
 You are the Economic & Resources Data Agent.  
 
-You will always be given two countries.  
+You will usually be given two countries. If only one country is given,  
+search for it once and return only the "country1" object.  
 
 For each country, you must:  
 - Perform exactly **one call** to the `tavily_search` tool with the query:  
@@ -154,17 +355,22 @@ Guidelines:
 - Provide a short **comparison_summary** highlighting which country is more economically sustainable for conflict.  
 """,
     tools=[tavily_search],
-).as_tool(
+    output_type=EconomicData,
+)
+economic_data_Agent = agent_tool(
+    economic_agent,
     tool_name="economic_data_agent",
-    tool_description="Fetches economic and resource capacity data for two countries."
+    tool_description="Fetches economic and resource capacity data for two countries.",
+    coalesce=True,
 )
 
-sentiment_data_Agent = agent.clone(
+sentiment_agent = agent.clone(
     name="Sentiment Data Agent",
     instructions="""
 You are the Sentiment Data Agent.  
 
-You will always be given two countries.  
+You will usually be given two countries. If only one country is given,  
+search for it once and return only the "country1" object.  
 For each country:  
 - Perform exactly **one call** to the `tavily_search` tool with the query:  
   "recent news sentiment, protests, public morale, political stability in <country>"  
@@ -192,30 +398,29 @@ Guidelines:
 - Keep summaries concise, realistic, and nuanced.  
 """,
     tools=[tavily_search],
-).as_tool(
+    output_type=SentimentData,
+)
+sentiment_data_Agent = agent_tool(
+    sentiment_agent,
     tool_name="sentiment_data_agent",
-    tool_description="Fetches real sentiment & social climate data for two countries."
+    tool_description="Fetches real sentiment & social climate data for two countries.",
+    coalesce=True,
 )
 
-citations_instructions = """
-You are the Citations Agent.
-
-Your role is to ensure every piece of information in the final report 
-is properly cited.  
-
-Tasks:
-1. Collect source links, references, and metadata from the data provided by other agents.  
-2. Format citations clearly (e.g., APA, MLA, or simple web links).  
-3. Ensure that each statistic, claim, or statement in the final prediction report 
-   can be traced back to a reliable source.  
-4. Return a clean list of citations at the end of the response.
-
-Do not add new content or opinions. Only provide accurate citations.
-"""
+@function_tool(name_override="CitationsAgent", is_enabled=tool_enabled("CitationsAgent"))
+async def CitationsAgent() -> str:
+    """
+    Return the numbered list of sources retrieved by tavily_search in this run.
+    """
+    started = time.perf_counter()
+    sources = get_sources()
+    citations = sources.format() if sources is not None else "No sources were recorded."
+    if get_budget() is not None:
+        get_budget().record_tool_call("CitationsAgent")
+    if get_metrics() is not None:
+        get_metrics().record_tool_time("CitationsAgent", time.perf_counter() - started)
+    return citations
 
-CitationsAgent = agent.clone(
-    name="Citations Agent", instructions=citations_instructions
-).as_tool(tool_name="CitationsAgent",tool_description="Military Data Gathering tool")
 
 reflection_instructions = """
 You are the Reflection Agent.
@@ -233,6 +438,13 @@ Tasks:
 Do not fetch new information. Only work with the data already provided.
 """
 
-ReflectionAgent = agent.clone(
-    name="Reflection Agent", instructions=reflection_instructions
-).as_tool(tool_name="ReflectionAgent",tool_description="Reflection Data Gathering tool")
+reflection_agent = agent.clone(
+    name="Reflection Agent",
+    instructions=reflection_instructions,
+    model=cached_model(llm_model),
+)
+ReflectionAgent = agent_tool(
+    reflection_agent,
+    tool_name="ReflectionAgent",
+    tool_description="Reflection Data Gathering tool",
+)
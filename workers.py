@@ -0,0 +1,298 @@
+import os
+import time
+import asyncio
+import argparse
+import multiprocessing as mp
+from collections import deque
+from datetime import datetime
+from multiprocessing.connection import wait
+from pathlib import Path
+import tools_agents
+from batch import (
+    limit_llm_concurrency,
+    load_completed,
+    load_pairs,
+    open_output,
+    pending_pairs,
+    run_pair,
+    write_record,
+)
+from clients import close_clients
+
+# 🏭 Worker pool defaults (override with environment variables)
+WORKERS = int(os.getenv("WORKERS", str(os.cpu_count() or 1)))
+# Tries per pair when the worker running it dies
+WORKER_MAX_ATTEMPTS = int(os.getenv("WORKER_MAX_ATTEMPTS", "2"))
+WORKER_MAX_RESTARTS = int(os.getenv("WORKER_MAX_RESTARTS", "20"))
+WORKER_STOP_TIMEOUT = 30
+
+
+def _receive(tasks):
+    try:
+        return tasks.recv()
+    except EOFError:
+        return None  # the supervisor is gone
+
+
+async def _serve(
+    tasks, results, concurrency, llm_concurrency, search_concurrency, narrative
+):
+    """Run the pairs sent by the supervisor on this process's event loop."""
+    tools_agents.TAVILY_MAX_CONCURRENCY = search_concurrency
+    limit_llm_concurrency(llm_concurrency)
+    loop = asyncio.get_running_loop()
+    running = set()
+
+    async def run(index: int, country1: str, country2: str):
+        record = await run_pair(country1, country2, narrative)
+        results.send((index, record))
+
+    try:
+        while True:
+            task = await loop.run_in_executor(None, _receive, tasks)
+            if task is None:
+                break
+            running.add(loop.create_task(run(*task)))
+            running = {t for t in running if not t.done()}
+        await asyncio.gather(*running)
+    finally:
+        await close_clients()
+
+
+def _worker(tasks, results, options: dict, initializer=None) -> None:
+    if initializer is not None:
+        initializer()
+    asyncio.run(_serve(tasks, results, **options))
+
+
+class _Worker:
+    def __init__(self, process, tasks, results):
+        self.process = process
+        self.tasks = tasks
+        self.results = results
+        self.in_flight: dict[int, tuple[str, str]] = {}
+
+
+class WorkerPool:
+    """
+    Shards country pairs across worker processes, each with its own event
+    loop and client pool (workers are spawned, so nothing is inherited).
+    Each worker gets at most `concurrency` pairs at a time; results come
+    back over per-worker pipes and are written to one output centrally.
+    The search cache, LLM cache and history are shared through their
+    SQLite/WAL files. A worker that dies is replaced and its in-flight
+    pairs are retried up to max_attempts times.
+    initializer runs first in every worker (e.g. replay.install_replay).
+    """
+
+    def __init__(
+        self,
+        workers: int = WORKERS,
+        concurrency: int = 4,
+        llm_concurrency: int = 8,
+        search_concurrency: int = 4,
+        narrative: bool = True,
+        max_attempts: int = WORKER_MAX_ATTEMPTS,
+        max_restarts: int = WORKER_MAX_RESTARTS,
+        initializer=None,
+    ):
+        self.workers = workers
+        self.concurrency = concurrency
+        self.options = {
+            "concurrency": concurrency,
+            "llm_concurrency": llm_concurrency,
+            "search_concurrency": search_concurrency,
+            "narrative": narrative,
+        }
+        self.max_attempts = max_attempts
+        self.max_restarts = max_restarts
+        self.initializer = initializer
+        self.restarts = 0
+        self._context = mp.get_context("spawn")
+        self._slots: list[_Worker] = []
+
+    def _start(self) -> _Worker:
+        tasks_recv, tasks_send = self._context.Pipe(duplex=False)
+        results_recv, results_send = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_worker,
+            args=(tasks_recv, results_send, self.options, self.initializer),
+            daemon=True,
+        )
+        process.start()
+        # The worker owns these ends; closing ours lets EOF reach each side
+        tasks_recv.close()
+        results_send.close()
+        return _Worker(process, tasks_send, results_recv)
+
+    def _dispatch(self, worker: _Worker, queue: deque) -> None:
+        while queue and len(worker.in_flight) < self.concurrency:
+            index, pair = queue.popleft()
+            worker.in_flight[index] = pair
+            try:
+                worker.tasks.send((index, *pair))
+            except (BrokenPipeError, OSError):
+                return  # the worker died; _replace requeues the pair
+
+    def _collect(self, worker: _Worker):
+        """Yield (index, record) for every result the worker has sent so far."""
+        while True:
+            try:
+                if not worker.results.poll():
+                    return
+                index, record = worker.results.recv()
+            except (EOFError, OSError):
+                return
+            worker.in_flight.pop(index, None)
+            yield index, record
+
+    def _replace(self, slot: int, queue: deque, attempts: dict) -> list[dict]:
+        """
+        Start a new worker in slot and requeue the dead one's pairs.
+        Returns error records for the pairs that are out of attempts.
+        """
+        worker = self._slots[slot]
+        worker.process.join()
+        failed = []
+        # Requeued in front, in their original order
+        for index, pair in sorted(worker.in_flight.items(), reverse=True):
+            attempts[index] = attempts.get(index, 1) + 1
+            if attempts[index] <= self.max_attempts:
+                queue.appendleft((index, pair))
+                continue
+            failed.append(
+                {
+                    "country1": pair[0],
+                    "country2": pair[1],
+                    "status": "error",
+                    "error": f"worker exited with code {worker.process.exitcode}",
+                    "completed_at": datetime.now().isoformat(),
+                }
+            )
+        self.restarts += 1
+        if self.restarts > self.max_restarts:
+            raise RuntimeError(f"workers crashed {self.restarts} times, giving up")
+        print(f"♻️ Worker {slot} exited ({worker.process.exitcode}), restarting")
+        self._slots[slot] = self._start()
+        return failed
+
+    def _stop(self) -> None:
+        for worker in self._slots:
+            try:
+                worker.tasks.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        deadline = time.monotonic() + WORKER_STOP_TIMEOUT
+        for worker in self._slots:
+            worker.process.join(max(0.0, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                worker.process.terminate()
+                worker.process.join()
+        self._slots = []
+
+    def run(self, pairs: list[tuple[str, str]], output: str | Path) -> dict:
+        """
+        Run every pair not already completed in output, appending one JSON
+        line per pair as it finishes (resumable like batch.py). Returns
+        the counts plus throughput and totals from the per-pair metrics.
+        """
+        completed = load_completed(output)
+        pending = pending_pairs(pairs, completed)
+        print(
+            f"📦 {len(pairs)} pairs: {len(completed)} already done, {len(pending)} to run "
+            f"on {self.workers} workers"
+        )
+        summary = {
+            "skipped": len(completed),
+            "ok": 0,
+            "error": 0,
+            "workers": self.workers,
+            "restarts": 0,
+            "tokens": 0,
+            "searches": 0,
+            "cached_searches": 0,
+        }
+        started = time.perf_counter()
+        queue = deque(enumerate(pending))
+        attempts: dict[int, int] = {}
+
+        def record_result(record: dict) -> None:
+            write_record(out, record)
+            summary[record["status"]] += 1
+            summary["tokens"] += (record.get("budget") or {}).get("tokens_used", 0)
+            searches = (record.get("metrics") or {}).get("searches", {})
+            summary["searches"] += searches.get("count", 0)
+            summary["cached_searches"] += searches.get("cached", 0)
+            icon = "✅" if record["status"] == "ok" else "❌"
+            print(
+                f"{icon} [{summary['ok'] + summary['error']}/{len(pending)}] "
+                f"{record['country1']} vs {record['country2']} "
+                f"({record.get('elapsed', '-')}s)"
+            )
+
+        with open_output(output) as out:
+            try:
+                if pending:
+                    workers = min(self.workers, len(pending))
+                    self._slots = [self._start() for _ in range(workers)]
+                while summary["ok"] + summary["error"] < len(pending):
+                    for worker in self._slots:
+                        self._dispatch(worker, queue)
+                    wait(
+                        [w.results for w in self._slots]
+                        + [w.process.sentinel for w in self._slots],
+                        timeout=1.0,
+                    )
+                    for slot, worker in enumerate(self._slots):
+                        for _, record in self._collect(worker):
+                            record_result(record)
+                        if not worker.process.is_alive():
+                            # Results sent before the crash were collected above
+                            for _, record in self._collect(worker):
+                                record_result(record)
+                            for record in self._replace(slot, queue, attempts):
+                                record_result(record)
+            finally:
+                self._stop()
+
+        elapsed = time.perf_counter() - started
+        summary["restarts"] = self.restarts
+        summary["elapsed"] = round(elapsed, 3)
+        summary["pairs_per_second"] = round(len(pending) / elapsed, 3) if elapsed else None
+        return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Analyse many country pairs across worker processes."
+    )
+    parser.add_argument("input", help="JSONL or CSV file of country pairs")
+    parser.add_argument(
+        "-o", "--output", default="reports/batch_results.jsonl", help="JSONL output"
+    )
+    parser.add_argument("--workers", type=int, default=WORKERS, help="worker processes")
+    parser.add_argument(
+        "--concurrency", type=int, default=4, help="pairs in flight per worker"
+    )
+    parser.add_argument("--llm-concurrency", type=int, default=8, help="per worker")
+    parser.add_argument("--search-concurrency", type=int, default=4, help="per worker")
+    parser.add_argument(
+        "--no-narrative",
+        action="store_true",
+        help="score pairs locally without the Prediction Agent narrative",
+    )
+    args = parser.parse_args()
+
+    pool = WorkerPool(
+        workers=args.workers,
+        concurrency=args.concurrency,
+        llm_concurrency=args.llm_concurrency,
+        search_concurrency=args.search_concurrency,
+        narrative=not args.no_narrative,
+    )
+    summary = pool.run(load_pairs(args.input), args.output)
+    print(
+        f"\n🏁 Pool finished: {summary['ok']} ok, {summary['error']} failed, "
+        f"{summary['skipped']} skipped, {summary['restarts']} worker restarts, "
+        f"{summary['pairs_per_second']} pairs/s"
+    )